@@ -1,23 +1,58 @@
+import logging
 import pendulum
 from pathlib import Path
 
 from include.etl import (
+    LazyEngine,
+    ParquetCache,
+    TableConfig,
+    changed_tables,
     get_database_conn,
     get_snowflake_conn,
     create_table_snowflake,
+    dbt_selection,
     elt_pipeline,
-    make_dbt_task
+    make_dbt_build_task,
+    plan_fact_groups
 )
 
 from airflow.decorators import dag, task, task_group
-from airflow.exceptions import AirflowFailException
+from airflow.exceptions import AirflowFailException, AirflowSkipException
 from airflow.operators.python import get_current_context
-from airflow.models import Variable
 
 
 # timezone default
 local_tz = pendulum.timezone("Asia/Jakarta")
 
+# cache parquet hasil extract, dipakai ulang saat retry / rerun / backfill
+landing_cache = ParquetCache(
+    "/usr/local/airflow/cache/landing",
+    max_age_days=7,
+    max_bytes=5 * 1024**3
+)
+
+# satu sumber untuk discovery tabel (saat parse) dan file SQL yang dijalankan task (filesystem lokal)
+SQL_DIR = Path(__file__).resolve().parents[1] / "include" / "sql"
+CREATE_SCHEMA = SQL_DIR / "create_schema.sql"
+DIM_QUERIES = SQL_DIR / "dimension"
+FACT_QUERIES = SQL_DIR / "fact"
+SOURCE_STORES = {"store_a": "retail_supply_chain"}   # store_id -> Airflow connection id
+# opsi load per tabel fact; `parent` = tabel line yang dibaca lewat key tabel header-nya
+FACT_CONFIG = {
+    "orders": TableConfig(mode="merge", window_column="order_date"),
+    "order_items": TableConfig(loader="copy", mode="merge", parent=("orders", "order_id")),
+    "sales": TableConfig(loader="copy", mode="merge", window_column="sale_date"),
+    "shipments": TableConfig(mode="merge", window_column="shipment_date"),
+    "shipment_items": TableConfig(mode="merge", parent=("shipments", "shipment_id")),
+    "stock": TableConfig(loader="copy", mode="swap", shards=3, shard_key="product_id"),
+}
+FACT_PARENTS = {table: options.parent for table, options in FACT_CONFIG.items() if options.parent}
+
+dimension_tables = sorted(f.stem for f in DIM_QUERIES.glob("*.sql"))
+fact_tables = sorted(f.stem for f in FACT_QUERIES.glob("*.sql"))
+# {(dimensi yang direferensikan): [[header, line, ...], [fact], ...]}
+fact_groups = plan_fact_groups(CREATE_SCHEMA, fact_tables, dimension_tables, FACT_PARENTS)
+
 default_args = {
     "retries" : 2,
     "retry_delay" : pendulum.duration(minutes=2)
@@ -36,35 +71,57 @@ default_args = {
 )
 def daily_sales():
 
-    sql_file = Variable.get("sql_file", default_var=None, deserialize_json=True)    
-    dbt_path = Variable.get("dbt_path", default_var=None, deserialize_json=True)
-    
-    create_schema = Path(sql_file["create_schema"])
-    fact_queries = Path(sql_file["fact_queries"])
-    dim_queries = Path(sql_file["dim_queries"])
-    
-    profile_path = dbt_path["profile_path"]
-    project_path = dbt_path["project_path"]
-
-    snowflake_conn = get_snowflake_conn("warehouse")
-    database_conn = get_database_conn("retail_supply_chain", "mysql")
+    # file SQL dari SQL_DIR, "dbt_path" lewat template {{ var.json.dbt_path.* }} di
+    # make_dbt_build_task -> parse DAG tidak menyentuh metadata DB
+    # engine baru dibuat saat pertama dipakai di dalam task, bukan saat DAG di-parse
+    snowflake_conn = LazyEngine(get_snowflake_conn, "warehouse")
+    # satu source per store; lebih dari satu store -> extract paralel + kolom store_id di landing.
+    # DDL landing, primary key dan model dbt belum punya store_id: elt_pipeline menolak mode multi-store
+    database_conns = {
+        store: LazyEngine(get_database_conn, conn_id, "mysql", pool_size=4, max_overflow=4)
+        for store, conn_id in SOURCE_STORES.items()
+    }
+    database_conn = next(iter(database_conns.values())) if len(database_conns) == 1 else database_conns
 
     @task()
     def create_table():
-        create_table_snowflake(snowflake_conn,create_schema)
+        create_table_snowflake(snowflake_conn, CREATE_SCHEMA)
+
+    @task()
+    def evict_cache():
+        # sekali per DAG run sebelum load: evict di dalam task load bisa menghapus partisi
+        # yang sedang di-replay task load lain
+        landing_cache.evict()
+
+    @task()
+    def load_dimension(table: str):
+        context = get_current_context()
 
-    @task(max_active_tis_per_dag=1)
-    def load_dimension():
-        elt_pipeline(
-            path_file = dim_queries,
+        outcomes = elt_pipeline(
+            path_file = DIM_QUERIES,
             source_conn = database_conn,
             snowflake_conn = snowflake_conn,
             schema = "landing",
-            type = "dimension"
+            type = "dimension",
+            chunksize = 50_000,
+            tables = [table],
+            # source dimensi tidak punya kolom updated_at -> extract penuh, di-SWAP utuh (baris yang
+            # dihapus di source ikut hilang), dilewati bila CHECKSUM sama. MERGE hanya untuk tabel ber-watermark
+            defaults = TableConfig(mode="swap", skip_unchanged=True),
+            schema_file = CREATE_SCHEMA,
+            typed = True,               # mis. products.category, warehouses.location -> category
+            run_id = context["run_id"]
             )
 
-    @task(max_active_tis_per_dag=1)
-    def load_fact():
+        # tabel dimensi yang tidak berubah sejak load terakhir -> XCom "skipped_tables"
+        skipped = sorted(t for t, o in outcomes.items() if o.get("reason") == "unchanged")
+        context["ti"].xcom_push(key="skipped_tables", value=skipped)
+        # tabel LANDING yang benar-benar menerima data baru -> XCom "changed_tables"
+        context["ti"].xcom_push(key="changed_tables", value=changed_tables(outcomes))
+        return outcomes
+
+    @task()
+    def load_fact(tables: list):
         context = get_current_context()
         ds = context["ds"]
 
@@ -76,45 +133,83 @@ def daily_sales():
         print("ds:", ds)
         print("prev_ds:", prev_ds)
         
-        elt_pipeline(
-            path_file = fact_queries,
+        outcomes = elt_pipeline(
+            path_file = FACT_QUERIES,
             source_conn = database_conn,
             snowflake_conn = snowflake_conn,
             schema = "landing",
             type = "fact",
             prev_ds = prev_ds,
-            ds = ds
+            ds = ds,
+            chunksize = 50_000,
+            tables = tables,
+            config = FACT_CONFIG,
+            schema_file = CREATE_SCHEMA,
+            typed = True,
+            pipelined = True,
+            run_id = context["run_id"],
+            cache = landing_cache,
+            # trigger dengan conf {"refresh_cache": true} -> backfill baca ulang source
+            cache_refresh = bool((context["dag_run"].conf or {}).get("refresh_cache", False))
             )
-        
+
+        context["ti"].xcom_push(key="changed_tables", value=changed_tables(outcomes))
+        return outcomes
+
+    @task()
+    def select_nodes(load_outcomes: list):
+        # satu dict outcome per task load (dimensi dan unit fact)
+        outcomes = {}
+        for result in load_outcomes:
+            outcomes.update(result)
+
+        changed = changed_tables(outcomes)
+        if not changed:
+            raise AirflowSkipException("Tidak ada tabel LANDING yang menerima data baru, dbt dilewati")
+
+        selection = dbt_selection(changed)
+        if set(changed) & set(fact_tables):
+            selection.append("dim_date")
+        logging.info(f"[DBT] Changed={changed}, Select={selection}")
+        return " ".join(selection)
+
     @task_group(group_id = "dbt_run_group")
-    def dbt_run_group():
-        dbt_test_source = make_dbt_task(
-                        task_id = "test_source",
-                        command = ["test", "--select", "source:*"],
-                        profile_path = profile_path,
-                        project_path = project_path
-                        )
-        dbt_run = make_dbt_task(
-                    task_id = "run_task",
-                    command = ["run"],
-                    profile_path = profile_path,
-                    project_path = project_path
-                    )
-        dbt_test_model = make_dbt_task(
-                    task_id = "test_model",
-                    command = ["test", "--select", "path:models/*"],
-                    profile_path = profile_path,
-                    project_path = project_path
-                    )
-        dbt_snapshot = make_dbt_task(
-                    task_id = "snapshot",
-                    command = ["snapshot"],
-                    profile_path = profile_path,
-                    project_path = project_path
-                    )
-
-        dbt_test_source >> dbt_run >> dbt_test_model >> dbt_snapshot
-
-    create_table() >> load_dimension() >> load_fact() >> dbt_run_group()
+    def dbt_run_group(load_outcomes: list):
+        # hanya subgraph dari source yang berubah (+ test & snapshot-nya) dalam satu `dbt build`,
+        # timing per fase ada di XCom (test_source, run, test_model, snapshot)
+        selection = select_nodes(load_outcomes)
+        selection >> make_dbt_build_task(
+            task_id = "build",
+            select = "{{ ti.xcom_pull(task_ids='dbt_run_group.select_nodes') }}",
+            # window [start, end) yang sama dengan extract fact -> incremental_predicates di model fact;
+            # test generic hanya cek window tsb, kecuali full audit mingguan (hari Minggu).
+            # lewat env var, bukan --vars: --vars yang berubah tiap hari memaksa full re-parse dbt
+            environment = {
+                "WINDOW_START": "{{ macros.ds_add(ds, -1) }}",
+                "WINDOW_END": "{{ ds }}",
+                "FULL_AUDIT": "{{ macros.datetime.strptime(ds, '%Y-%m-%d').weekday() == 6 }}"
+                }
+            )
+
+    prepared = [create_table(), evict_cache()]
+    load_outputs = []
+
+    # satu task + pool "etl_<tabel>" per tabel dimensi, supaya fact hanya menunggu dimensi yang direferensikan
+    dimension_tasks = {}
+    for table in dimension_tables:
+        dimension_tasks[table] = load_dimension.override(task_id=f"load_dimension_{table}", pool=f"etl_{table}")(table)
+        prepared >> dimension_tasks[table]
+        load_outputs.append(dimension_tasks[table])
+
+    # satu task per unit fact (header + line), pool "etl_<header>". Bukan satu mapped task per kelompok:
+    # pool mapped task sama untuk semua map index, jadi tidak bisa per tabel
+    for referenced, units in fact_groups.items():
+        upstream = [dimension_tasks[table] for table in referenced] or prepared
+        for unit in units:
+            facts = load_fact.override(task_id=f"load_fact_{unit[0]}", pool=f"etl_{unit[0]}")(unit)
+            upstream >> facts
+            load_outputs.append(facts)
+
+    dbt_run_group(load_outputs)
 
 daily_sales()
@@ -1,5 +1,6 @@
-from .connections import get_database_conn, get_snowflake_conn
+from .cache import ParquetCache
+from .connections import LazyEngine, get_database_conn, get_snowflake_conn
 from .extract import extract_from_source
 from .load import load_to_snowflake
-from .pipeline import elt_pipeline
-from .utils import create_table_snowflake, make_dbt_task
\ No newline at end of file
+from .pipeline import TableConfig, changed_tables, elt_pipeline
+from .utils import create_table_snowflake, dbt_selection, get_config, make_dbt_build_task, make_dbt_task, plan_fact_groups
\ No newline at end of file
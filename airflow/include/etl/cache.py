@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+
+MANIFEST = "_manifest.json"
+
+
+class ParquetCache:
+    """
+    Local Parquet cache of extracted batches, partitioned by table and ds.
+
+    Every extraction is stored as `<root>/<table>/ds=<partition>/part-*.parquet`
+    plus a `_manifest.json` with the row count, the part files and a SHA-256
+    of their content. Callers should fold everything that determines the
+    extracted rows into the partition (see `partition_key`), so an edited
+    query or different parameters never replay an old extraction. The
+    manifest is written last (and the partition directory renamed into
+    place atomically), so a partition without a manifest is never read.
+    Retries, reruns and backfills can replay a partition from disk instead
+    of querying the source database again.
+
+    Args:
+        root (str or Path): Cache directory.
+        max_age_days (float, optional): Partitions older than this are
+            evicted. None keeps them regardless of age.
+        max_bytes (int, optional): Total size budget. The oldest partitions
+            are evicted until the cache fits. None disables the limit.
+
+    Example:
+        >>> cache = ParquetCache("/usr/local/airflow/cache/landing", max_age_days=7)
+        >>> df = extract_from_source("sales", engine, query=sql, cache=cache, cache_partition="2025-09-25")
+        >>> cache.evict()
+    """
+
+    def __init__(self, root, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+
+    def path(self, table_name: str, partition: str) -> Path:
+        return self.root / table_name / f"ds={partition}"
+
+    def manifest(self, table_name: str, partition: str) -> Optional[dict]:
+        """
+        Return the manifest of a complete partition, or None if it is not cached.
+        """
+        manifest_path = self.path(table_name, partition) / MANIFEST
+        if not manifest_path.exists():
+            return None
+        return json.loads(manifest_path.read_text())
+
+    def has(self, table_name: str, partition: str) -> bool:
+        return self.manifest(table_name, partition) is not None
+
+    def read(self, table_name: str, partition: str, verify: bool = True, **read_options) -> Iterator[pd.DataFrame]:
+        """
+        Yield the cached batches of a partition in their original order.
+
+        Args:
+            table_name (str): Table name.
+            partition (str): Partition value, usually `ds`.
+            verify (bool, optional): Check the content hash before reading.
+                Defaults to True.
+            **read_options: Passed to `pd.read_parquet`, e.g.
+                `dtype_backend="pyarrow"`.
+
+        Returns:
+            Iterator[pd.DataFrame]: Cached batches.
+
+        Raises:
+            ValueError: If the partition is missing or its hash does not match.
+        """
+        manifest = self.manifest(table_name, partition)
+        if manifest is None:
+            raise ValueError(f"Cache {table_name} ds={partition} tidak ditemukan")
+
+        directory = self.path(table_name, partition)
+        files = [directory / name for name in manifest["parts"]]
+        if verify and _content_hash(files) != manifest["sha256"]:
+            raise ValueError(f"Hash cache {table_name} ds={partition} tidak cocok")
+
+        logging.info(f"[CACHE] Replay Table={table_name}, ds={partition}, Rows={manifest['rows']}, Parts={len(files)}")
+        for path in files:
+            yield pd.read_parquet(path, **read_options)
+
+    def write_through(self, table_name: str, partition: str, frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Pass batches through unchanged while persisting them to the cache.
+
+        The partition is only published (manifest + rename) once `frames` is
+        fully consumed; an interrupted extraction leaves nothing behind.
+
+        Args:
+            table_name (str): Table name.
+            partition (str): Partition value, usually `ds`.
+            frames (Iterable[pd.DataFrame]): Extracted batches.
+
+        Returns:
+            Iterator[pd.DataFrame]: The same batches.
+        """
+        final_dir = self.path(table_name, partition)
+        tmp_dir = final_dir.with_name(f".{final_dir.name}.{uuid.uuid4().hex}")
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        parts, rows = [], 0
+        try:
+            for i, frame in enumerate(frames):
+                name = f"part-{i:05d}.parquet"
+                frame.to_parquet(tmp_dir / name, compression="snappy", index=False)
+                parts.append(name)
+                rows += len(frame)
+                yield frame
+
+            manifest = {
+                "table": table_name,
+                "ds": partition,
+                "rows": rows,
+                "parts": parts,
+                "sha256": _content_hash([tmp_dir / name for name in parts]),
+                "created_at": time.time(),
+            }
+            (tmp_dir / MANIFEST).write_text(json.dumps(manifest))
+
+            shutil.rmtree(final_dir, ignore_errors=True)
+            tmp_dir.rename(final_dir)
+            logging.info(f"[CACHE] Simpan Table={table_name}, ds={partition}, Rows={rows}, Parts={len(parts)}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def evict(self) -> List[Path]:
+        """
+        Remove partitions older than `max_age_days`, then the oldest ones until
+        the cache fits in `max_bytes`.
+
+        Only published partitions (with a manifest) are considered, but one
+        that a load is replaying can still be removed, so run this once per
+        DAG run before the load tasks start (see the `evict_cache` task of
+        `daily_sales`), never from the loads themselves.
+
+        Returns:
+            List[Path]: Removed partition directories.
+        """
+        partitions = []
+        for manifest_path in self.root.glob(f"*/ds=*/{MANIFEST}"):
+            directory = manifest_path.parent
+            created_at = json.loads(manifest_path.read_text()).get("created_at", 0)
+            size = sum(f.stat().st_size for f in directory.iterdir() if f.is_file())
+            partitions.append((created_at, size, directory))
+        partitions.sort()
+
+        removed = []
+        now = time.time()
+        total = sum(size for _, size, _ in partitions)
+        for created_at, size, directory in partitions:
+            too_old = self.max_age_days is not None and now - created_at > self.max_age_days * 86400
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            removed.append(directory)
+
+        if removed:
+            logging.info(f"[CACHE] Evict Partitions={len(removed)}, Sisa={total} bytes")
+        return removed
+
+def partition_key(partition: str, query: Optional[str], params: Optional[dict] = None, parent_keys=None) -> str:
+    """
+    Build a cache partition from `ds` and a hash of what is extracted.
+
+    The compiled SQL text, the bound parameter values (window bounds,
+    lookback, watermark, ...) and the parent keys are hashed, so changing
+    any of them within the retention period reads the source again instead
+    of replaying a stale partition.
+
+    Args:
+        partition (str): Base partition, usually `ds`.
+        query (str, optional): Extraction query; None for a whole table.
+        params (dict, optional): Bound parameter values.
+        parent_keys (Iterable, optional): Keys of a by-parent extraction.
+
+    Returns:
+        str: `<partition>__<hash>`, e.g. `"2025-09-25__3f1c2a9b04d7"`.
+    """
+    digest = hashlib.sha256()
+    digest.update((query or "").encode())
+    digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    if parent_keys is not None:
+        digest.update(json.dumps(sorted(parent_keys), default=str).encode())
+    return f"{partition}__{digest.hexdigest()[:12]}"
+
+def _content_hash(files: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+if __name__ == "__main__":
+    pass
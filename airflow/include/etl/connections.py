@@ -1,8 +1,12 @@
 import json
 import logging
+import os
+import threading
 from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from airflow.exceptions import AirflowFailException
 from airflow.hooks.base import BaseHook
 
@@ -144,5 +148,103 @@ def get_database_conn(
     except Exception as e:
         raise AirflowFailException(f"Gagal konek ke {conn_type}: {e}")
 
+def engine_capacity(engine) -> Optional[int]:
+    """
+    Return how many connections an Engine can hand out at the same time.
+
+    This is `pool_size + max_overflow` for a `QueuePool`. None is returned
+    when the pool is unbounded or its size cannot be determined.
+
+    Args:
+        engine (Engine): SQLAlchemy Engine.
+
+    Returns:
+        int or None: Maximum number of concurrent connections.
+
+    Example:
+        >>> engine_capacity(get_database_conn("retail_supply_chain", "mysql"))
+        4
+    """
+    pool = getattr(resolve_engine(engine), "pool", None)
+    if pool is None or not hasattr(pool, "size"):
+        return None
+
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:
+        return None
+    return pool.size() + max_overflow
+
+_engines: Dict[Tuple, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+class LazyEngine:
+    """
+    Parse-time placeholder for a SQLAlchemy Engine.
+
+    Creating it does no work: no Airflow Connection lookup and no engine.
+    The real engine is built on first use (`resolve()` or any Engine
+    attribute such as `connect`, `begin` or `dialect`) and is shared by every
+    LazyEngine with the same factory, arguments and pool settings in the
+    same process. After a fork the child drops the inherited engines
+    (without closing the parent's sockets) and builds its own.
+
+    Args:
+        factory (Callable): Engine factory, e.g. `get_snowflake_conn`.
+        *args: Positional arguments of the factory (connection id first).
+        **options: Keyword arguments of the factory (pool settings).
+
+    Example:
+        >>> snowflake_conn = LazyEngine(get_snowflake_conn, "warehouse")
+        >>> with snowflake_conn.begin() as conn:  # engine created here
+        ...     conn.execute("SELECT 1")
+    """
+
+    def __init__(self, factory: Callable[..., Engine], *args, **options):
+        self.factory = factory
+        self.args = args
+        self.options = options
+        self.key = (factory.__qualname__, args, tuple(sorted(options.items())))
+
+    def resolve(self) -> Engine:
+        engine = _engines.get(self.key)
+        if engine is not None:
+            return engine
+
+        with _engines_lock:
+            engine = _engines.get(self.key)
+            if engine is None:
+                engine = self.factory(*self.args, **self.options)
+                _engines[self.key] = engine
+            return engine
+
+    def __getattr__(self, name):
+        # dunder/private lookups (copy, pickle) must not resolve: `self.key`
+        # may not exist yet and __getattr__ would recurse
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        return f"LazyEngine({self.factory.__name__}, {', '.join(map(repr, self.args))})"
+
+def resolve_engine(engine) -> Engine:
+    """
+    Return the real Engine behind a LazyEngine, or `engine` unchanged.
+
+    Pandas and SQLAlchemy type-check their `con` arguments, so library
+    entry points resolve proxies before handing them on.
+    """
+    return engine.resolve() if isinstance(engine, LazyEngine) else engine
+
+def _forget_engines_after_fork():
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _engines.clear()
+
+os.register_at_fork(after_in_child=_forget_engines_after_fork)
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -1,18 +1,36 @@
 import logging
-from typing import Callable, Optional, Union
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
-from sqlalchemy.engine import Engine
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
 from airflow.exceptions import AirflowFailException
 
+from .connections import resolve_engine
+from .stage import copy_into, new_stage_prefix, put_to_stage, table_stage, write_parquet_files
+
+LOADERS = ("insert", "copy")
+MODES = ("truncate", "merge", "swap")
+# urutan baris dalam load merge; hanya ada di tabel temporary, tidak di target
+SEQUENCE_COLUMN = "_etl_seq"
+
 def load_to_snowflake(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
     conn_snowflake: Engine,
     table_name: str,
     schema: str = "LANDING",
     chunksize: Optional[int] = None,
     if_exists: str = "append",
-    method: Optional[Union[str, Callable]] = None
+    method: Optional[Union[str, Callable]] = None,
+    loader: str = "insert",
+    stage: Optional[Union[str, Path]] = None,
+    mode: str = "truncate",
+    key_columns: Optional[List[str]] = None,
+    delete_window: Optional[Tuple[str, Any, Any]] = None,
+    checkpoint: Optional[Callable[[Connection, int, pd.DataFrame], None]] = None,
+    resume_after: int = 0
 ):
     """
     Load data from a Pandas DataFrame into a Snowflake table.
@@ -21,14 +39,61 @@ def load_to_snowflake(
     into Snowflake. The operation is wrapped in a transaction: if any error
     occurs, all changes will be rolled back.
 
+    `df` may also be an iterator of DataFrames (for example the streaming
+    output of `extract_from_source(..., chunksize=...)`). Batches are then
+    written one after another inside the same transaction, so only one
+    batch is held in memory at a time.
+
+    With `loader="copy"` the batches are instead written to Snappy-compressed
+    Parquet files, uploaded with `PUT` to a stage and loaded with
+    `COPY INTO {schema}.{table_name}` in the same transaction as the
+    `TRUNCATE`. This is Snowflake's bulk-load path and avoids huge
+    `INSERT ... VALUES` statements.
+
+    With `mode="merge"` the target is not truncated: the batches are loaded
+    into a temporary table and upserted into the target with `MERGE` on
+    `key_columns`. Rows sharing a key within the loaded data are collapsed
+    to the one loaded last: every row carries its position in the load
+    (`_etl_seq`, temporary table only) and `QUALIFY ROW_NUMBER() OVER
+    (... ORDER BY _etl_seq DESC) = 1` keeps the latest, so overlapping or
+    late-arriving extractions never make the MERGE fail on duplicate source
+    rows and always resolve the same way. With
+    `delete_window=(column, start, end)` the target rows whose `column` lies
+    in the half-open window `[start, end)` are deleted first, in the same
+    transaction as the MERGE, so rows removed at the source within that
+    window do not linger and reruns of the same `ds` stay idempotent.
+    Snowflake commits implicitly on DDL, so the temporary table is created
+    and filled before that transaction and dropped after it: a failed write
+    or MERGE leaves the target untouched, and readers never see the window
+    empty.
+
+    With `mode="swap"` the batches are written into `<table>__staging`
+    (created with `CREATE TABLE ... LIKE ... COPY GRANTS`), the row count is
+    verified, and the staging table is atomically exchanged with the target
+    through `ALTER TABLE ... SWAP WITH`. Readers never see an empty or
+    half-loaded table, and the insert itself never touches the live table.
+    SWAP exchanges access grants together with the data, so the staging
+    table copies the target's grants first; otherwise every role but the
+    loader would lose access to the table after the swap.
+
+    When `checkpoint` is given (insert loader, truncate/merge mode) every
+    batch is committed in its own transaction and `checkpoint(conn,
+    chunk_no, frame)` is called inside that transaction. A retry passes
+    the number of batches an earlier attempt committed as `resume_after`:
+    chunk numbers continue after it and the truncate or window delete is
+    not repeated. Nothing is skipped here; `df` must only yield the rows
+    that are not loaded yet (e.g. `WHERE key > :last_key` on a query
+    ordered by that key, see `elt_pipeline`).
+
     Args:
-        df (pd.DataFrame): DataFrame containing the data to load.
-        conn_snowflake (Engine): SQLAlchemy Engine or active connection 
+        df (pd.DataFrame or Iterable[pd.DataFrame]): DataFrame, or iterator
+            of DataFrames, containing the data to load.
+        conn_snowflake (Engine): SQLAlchemy Engine or active connection
             to Snowflake.
         table_name (str): Name of the target table in Snowflake.
-        schema (str, optional): Snowflake schema where the table resides. 
+        schema (str, optional): Snowflake schema where the table resides.
             Defaults to `"LANDING"`.
-        chunksize (int, optional): Number of rows per batch insert. 
+        chunksize (int, optional): Number of rows per batch insert.
             - None: write all rows at once.
             - int: split inserts into batches of this size.
         if_exists (str, optional): Behavior if the target table already exists:
@@ -39,13 +104,35 @@ def load_to_snowflake(
         method (str or Callable, optional): Insert method passed to Pandas `to_sql`.
             - None: Default row-by-row insert.
             - "multi": Execute batch inserts (faster).
-            - Callable: Custom insert function with the signature 
+            - Callable: Custom insert function with the signature
               `(table, conn, keys, data_iter)`.
+            Only used by the `"insert"` loader.
+        loader (str, optional): Load strategy:
+            - "insert": Pandas `to_sql` with `method` (default).
+            - "copy"  : Parquet files + PUT + COPY INTO.
+        stage (str or Path, optional): Stage used by the `"copy"` loader.
+            A Snowflake stage such as `"@LANDING.ETL_STAGE"`, or a local
+            directory (`"file:///tmp/stage"`) for testing. Defaults to the
+            table stage `@{schema}.%{table_name}`.
+        mode (str, optional): How the target table is refreshed:
+            - "truncate": Empty the table, then load (default).
+            - "merge"   : Upsert into the table on `key_columns`.
+            - "swap"    : Load a shadow table, then swap it with the target.
+        key_columns (List[str], optional): Key columns for `mode="merge"`.
+        delete_window (tuple, optional): `(column, start, end)` half-open
+            window of target rows to delete before merging. Only used with `mode="merge"`.
+        checkpoint (Callable, optional): `(conn, chunk_no, frame)` callback
+            run in each batch transaction; enables per-batch commits.
+        resume_after (int, optional): Number of batches already committed
+            by a previous attempt, whose rows `df` no longer contains.
+            Defaults to 0.
 
     Returns:
-        None
+        int: Number of rows loaded.
 
     Raises:
+        ValueError: If `loader` or `mode` is unknown, or `mode="merge"` is
+            used without `key_columns`.
         AirflowFailException: If the load operation into Snowflake fails.
 
     Example:
@@ -58,25 +145,301 @@ def load_to_snowflake(
         ...     if_exists="append",
         ...     method="multi"
         ... )
+
+        >>> load_to_snowflake(
+        ...     df=df,
+        ...     conn_snowflake=snowflake_engine,
+        ...     table_name="sales",
+        ...     loader="copy",
+        ...     stage="@LANDING.ETL_STAGE"
+        ... )
+
+        >>> load_to_snowflake(
+        ...     df=changed_products,
+        ...     conn_snowflake=snowflake_engine,
+        ...     table_name="products",
+        ...     mode="merge",
+        ...     key_columns=["product_id"]
+        ... )
+
+        >>> load_to_snowflake(
+        ...     df=sales_df,
+        ...     conn_snowflake=snowflake_engine,
+        ...     table_name="sales",
+        ...     mode="merge",
+        ...     key_columns=["sale_id"],
+        ...     delete_window=("sale_date", "2025-09-22", "2025-09-23")
+        ... )
+    """
+
+    if loader not in LOADERS:
+        raise ValueError(f"loader harus salah satu dari {LOADERS}, bukan '{loader}'")
+    if mode not in MODES:
+        raise ValueError(f"mode harus salah satu dari {MODES}, bukan '{mode}'")
+    if mode == "merge" and not key_columns:
+        raise ValueError(f"key_columns wajib diisi untuk mode='merge' ({table_name})")
+
+    conn_snowflake = resolve_engine(conn_snowflake)
+
+    frames = [df] if isinstance(df, pd.DataFrame) else df
+    seen = {}
+    frames = _track_columns(frames, seen)
+    if mode == "merge":
+        frames = _sequenced(frames)
+
+    if checkpoint is not None and loader == "insert" and mode in ("truncate", "merge"):
+        return _load_by_chunk(
+            frames, conn_snowflake, table_name, schema, chunksize, method,
+            mode, key_columns, delete_window, checkpoint, resume_after, seen
+        )
+
+    try:
+        with tempfile.TemporaryDirectory(prefix=f"{table_name}_") as tmp_dir:
+            if loader == "copy":
+                # Parquet + PUT happen before the transaction, only COPY runs inside it.
+                stage = stage or table_stage(table_name, schema)
+                prefix = new_stage_prefix(table_name)
+                files, staged_rows = write_parquet_files(frames, Path(tmp_dir), table_name)
+                if files:
+                    put_to_stage(conn_snowflake, files, stage, prefix)
+
+                def write(conn: Connection, target: str) -> int:
+                    if files:
+                        copy_into(conn, target, schema, stage, prefix)
+                    return staged_rows
+            else:
+                def write(conn: Connection, target: str) -> int:
+                    return _insert_frames(conn, frames, target, schema, chunksize, if_exists, method)
+
+            if mode == "swap":
+                row_count = _swap(conn_snowflake, write, table_name, schema)
+            elif mode == "merge":
+                row_count = _merge(conn_snowflake, write, table_name, schema, key_columns, seen, delete_window)
+            else:
+                with conn_snowflake.begin() as conn:
+                    conn.execute(f"TRUNCATE TABLE {schema}.{table_name}")
+                    row_count = write(conn, table_name)
+
+        logging.info(
+            f"[LOAD] Table={schema}.{table_name}, STATUS=Success, ROWS={row_count}, "
+            f"CHUNKS={chunksize}, LOADER={loader}, MODE={mode}"
+        )
+        return row_count
+
+    except Exception as e:
+        raise AirflowFailException(f"[LOAD ERROR] {table_name}: {e}")
+
+def _load_by_chunk(
+    frames: Iterable[pd.DataFrame],
+    conn_snowflake: Engine,
+    table_name: str,
+    schema: str,
+    chunksize: Optional[int],
+    method: Optional[Union[str, Callable]],
+    mode: str,
+    key_columns: Optional[List[str]],
+    delete_window: Optional[Tuple[str, Any, Any]],
+    checkpoint: Callable[[Connection, int, pd.DataFrame], None],
+    resume_after: int,
+    seen: dict
+) -> int:
+    """
+    Commit every batch (plus its checkpoint) in its own transaction.
+
+    Only the very first batch of a fresh attempt empties the target (truncate)
+    or deletes the window (merge), in the same transaction as its own rows.
+    Batches of a resumed attempt are numbered after `resume_after`.
     """
 
     try:
-        with conn_snowflake.begin() as conn:
-            conn.execute(f"TRUNCATE TABLE {schema}.{table_name}")
-            df.to_sql(
-                name=table_name,
-                con=conn,
-                schema=schema,
-                chunksize=chunksize,
-                index=False,
-                if_exists=if_exists,
-                method=method
-            )
-        row_count = len(df)
-        logging.info(f"[LOAD] Table={schema}.{table_name}, STATUS=Success, ROWS={row_count}, CHUNKS={chunksize}")
-    
+        row_count = 0
+        chunk_no = resume_after
+        for chunk_no, frame in enumerate(frames, start=resume_after + 1):
+            row_count += len(frame)
+
+            first = chunk_no == 1
+            mark = lambda conn, chunk_no=chunk_no, frame=frame: checkpoint(conn, chunk_no, frame)
+            if mode == "truncate":
+                with conn_snowflake.begin() as conn:
+                    if first:
+                        conn.execute(f"TRUNCATE TABLE {schema}.{table_name}")
+                    _insert_frames(conn, [frame], table_name, schema, chunksize, "append", method)
+                    mark(conn)
+            else:
+                write = lambda c, target, frame=frame: _insert_frames(c, [frame], target, schema, chunksize, "append", method)
+                _merge(
+                    conn_snowflake, write, table_name, schema, key_columns, seen,
+                    delete_window if first else None, on_commit=mark
+                )
+
+        if chunk_no == 0:
+            with conn_snowflake.begin() as conn:
+                if mode == "truncate":
+                    conn.execute(f"TRUNCATE TABLE {schema}.{table_name}")
+                elif delete_window:
+                    _delete_window(conn, table_name, schema, *delete_window)
+
+        logging.info(
+            f"[LOAD] Table={schema}.{table_name}, STATUS=Success, ROWS={row_count}, "
+            f"CHUNKS={chunk_no}, RESUMED_AFTER={resume_after}, MODE={mode}"
+        )
+        return row_count
+
     except Exception as e:
         raise AirflowFailException(f"[LOAD ERROR] {table_name}: {e}")
 
+def _track_columns(frames: Iterable[pd.DataFrame], seen: dict) -> Iterable[pd.DataFrame]:
+    """
+    Pass frames through, remembering the column names of the first one.
+    """
+    for frame in frames:
+        seen.setdefault("columns", list(frame.columns))
+        yield frame
+
+def _sequenced(frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Pass frames through with `SEQUENCE_COLUMN` numbering their rows across all frames.
+    """
+    start = 0
+    for frame in frames:
+        sequenced = frame.copy(deep=False)
+        sequenced[SEQUENCE_COLUMN] = range(start, start + len(frame))
+        start += len(frame)
+        yield sequenced
+
+def _insert_frames(
+    conn: Connection,
+    frames: Iterable[pd.DataFrame],
+    table_name: str,
+    schema: str,
+    chunksize: Optional[int],
+    if_exists: str,
+    method: Optional[Union[str, Callable]]
+) -> int:
+    """
+    Append frames to a table with Pandas `to_sql`, returning the row count.
+    """
+    row_count = 0
+    for i, frame in enumerate(frames):
+        frame.to_sql(
+            name=table_name,
+            con=conn,
+            schema=schema,
+            chunksize=chunksize,
+            index=False,
+            if_exists=if_exists if i == 0 else "append",
+            method=method
+        )
+        row_count += len(frame)
+    return row_count
+
+def _delete_window(conn: Connection, table_name: str, schema: str, column: str, start: Any, end: Any):
+    """
+    Delete target rows whose `column` lies in `[start, end)`.
+    """
+    result = conn.execute(
+        text(f"DELETE FROM {schema}.{table_name} WHERE {column} >= :start AND {column} < :end"),
+        {"start": start, "end": end},
+    )
+    logging.info(f"[LOAD] Table={schema}.{table_name}, DELETED={result.rowcount}, WINDOW={column}:{start}..{end}")
+
+def _merge(
+    conn_snowflake: Engine,
+    write: Callable[[Connection, str], int],
+    table_name: str,
+    schema: str,
+    key_columns: List[str],
+    seen: dict,
+    delete_window: Optional[Tuple[str, Any, Any]] = None,
+    on_commit: Optional[Callable[[Connection], None]] = None
+) -> int:
+    """
+    Load into a temporary copy of the target, then DELETE the window and MERGE
+    on the key columns in one transaction.
+
+    DDL commits implicitly in Snowflake, so the temporary table is created and
+    filled before that transaction and dropped after it; only DML (and
+    `on_commit`, e.g. a checkpoint insert) runs inside. Everything uses one
+    connection because temporary tables are session-scoped.
+    """
+    temp_table = f"{table_name}__merge"
+
+    with conn_snowflake.connect() as conn:
+        conn.execute(f"CREATE OR REPLACE TEMPORARY TABLE {schema}.{temp_table} LIKE {schema}.{table_name}")
+        conn.execute(f"ALTER TABLE {schema}.{temp_table} ADD COLUMN {SEQUENCE_COLUMN} NUMBER")
+        try:
+            with conn.begin():
+                row_count = write(conn, temp_table)
+
+            with conn.begin():
+                if delete_window:
+                    _delete_window(conn, table_name, schema, *delete_window)
+                if row_count:
+                    conn.execute(_merge_sql(table_name, temp_table, schema, key_columns, seen["columns"]))
+                if on_commit is not None:
+                    on_commit(conn)
+        finally:
+            conn.execute(f"DROP TABLE IF EXISTS {schema}.{temp_table}")
+
+    return row_count
+
+def _swap(
+    conn_snowflake: Engine,
+    write: Callable[[Connection, str], int],
+    table_name: str,
+    schema: str
+) -> int:
+    """
+    Load a `__staging` shadow table, verify it and SWAP it with the target.
+    """
+    staging_table = f"{table_name}__staging"
+    target = f"{schema}.{table_name}"
+    staging = f"{schema}.{staging_table}"
+
+    with conn_snowflake.begin() as conn:
+        conn.execute(f"CREATE OR REPLACE TABLE {staging} LIKE {target} COPY GRANTS")
+
+    try:
+        with conn_snowflake.begin() as conn:
+            row_count = write(conn, staging_table)
+
+        with conn_snowflake.begin() as conn:
+            staged_count = conn.execute(f"SELECT COUNT(*) FROM {staging}").scalar()
+            if staged_count != row_count:
+                raise ValueError(
+                    f"Jumlah baris {staging} ({staged_count}) tidak sama dengan yang dimuat ({row_count})"
+                )
+            conn.execute(f"ALTER TABLE {target} SWAP WITH {staging}")
+    finally:
+        with conn_snowflake.begin() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {staging}")
+
+    return row_count
+
+def _merge_sql(table_name: str, source_table: str, schema: str, key_columns: List[str], columns: List[str]) -> str:
+    """
+    Build a `MERGE` statement upserting `source_table` into `table_name`.
+
+    The source is deduplicated on the key columns first, because MERGE is
+    nondeterministic (or fails) when several source rows match one target row.
+    The row loaded last (highest `SEQUENCE_COLUMN`) wins. `columns` are the
+    loaded columns without `SEQUENCE_COLUMN`.
+    """
+    on = " AND ".join(f"t.{k} = s.{k}" for k in key_columns)
+    keys = ", ".join(key_columns)
+    updates = ", ".join(f"{c} = s.{c}" for c in columns if c not in key_columns)
+    insert_cols = ", ".join(columns)
+    insert_vals = ", ".join(f"s.{c}" for c in columns)
+
+    source = (
+        f"(SELECT * FROM {schema}.{source_table} "
+        f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY {SEQUENCE_COLUMN} DESC) = 1)"
+    )
+
+    sql = f"MERGE INTO {schema}.{table_name} AS t USING {source} AS s ON {on} "
+    if updates:
+        sql += f"WHEN MATCHED THEN UPDATE SET {updates} "
+    return sql + f"WHEN NOT MATCHED THEN INSERT ({insert_cols}) VALUES ({insert_vals})"
+
 if __name__ == "__main__":
-    pass
\ No newline at end of file
+    pass
@@ -1,90 +1,637 @@
+import datetime
 import logging
+import tempfile
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
+import pandas as pd
 from sqlalchemy.engine import Engine
+from airflow.exceptions import AirflowFailException
 
-from .extract import extract_from_source
+from .cache import ParquetCache
+from .connections import engine_capacity, resolve_engine
+from .extract import extract_from_source, fingerprint_frames, fingerprint_table
 from .load import load_to_snowflake
-from .utils import insert_snowflake
+from .stage import write_parquet_files
+from .state import (
+    get_fingerprint,
+    get_watermark,
+    load_checkpoints,
+    save_checkpoint,
+    set_fingerprint,
+    set_watermark,
+)
+from .templates import load_template
+from .transform import encode_categories, read_dtypes
+from .utils import fan_in, insert_snowflake, read_table_schema
 
 
+class TableConfig(NamedTuple):
+    """
+    Load options of one table in `elt_pipeline`.
+
+    Attributes:
+        loader (str): `"insert"` or `"copy"`, see `load_to_snowflake`.
+        mode (str): `"truncate"`, `"merge"` or `"swap"`, see
+            `load_to_snowflake`. Watermarked tables always merge.
+        shards (int): Key-range slices read in parallel, see
+            `extract_from_source`.
+        shard_key (str): Column used to split a sharded table.
+        watermark (str): Change column for incremental extraction, e.g.
+            `"updated_at"`. Only rows above the mark of the previous run are
+            extracted and merged. Must not be a merge key: a key column only
+            moves on inserts, so updates would never be read.
+        key_columns (List[str]): Merge keys. Defaults to the primary keys
+            declared in `schema_file`.
+        window_column (str): Date column bounding the target rows deleted
+            before a merge, so reruns of the same `ds` stay idempotent.
+        lookback_days (int): Extra days re-extracted before the window for
+            late-arriving rows.
+        dtypes (Dict[str, str]): `{column: dtype}` overrides for typed
+            extraction.
+        skip_unchanged (bool): Skip the load when the content fingerprint
+            equals the one of the last successful load.
+        parent (Tuple[str, str]): `(header table, key column)` of a line
+            table read through the keys of its header, e.g.
+            `("orders", "order_id")`. The query is `by_parent/<table>.sql`
+            with an `IN :parent_keys` filter.
+    """
+    loader: str = "insert"
+    mode: str = "truncate"
+    shards: int = 1
+    shard_key: Optional[str] = None
+    watermark: Optional[str] = None
+    key_columns: Optional[List[str]] = None
+    window_column: Optional[str] = None
+    lookback_days: int = 0
+    dtypes: Optional[Dict[str, str]] = None
+    skip_unchanged: bool = False
+    parent: Optional[Tuple[str, str]] = None
+
 def elt_pipeline(
     path_file: Path,
-    source_conn: Engine,
+    source_conn: Union[Engine, Dict[str, Engine]],
     snowflake_conn: Engine,
     prev_ds = None,
     ds = None,
     schema: str = "RAW",
-    type: str = "dimension"
+    type: str = "dimension",
+    chunksize: Optional[int] = None,
+    config: Optional[Dict[str, TableConfig]] = None,
+    defaults: TableConfig = TableConfig(),
+    tables: Optional[List[str]] = None,
+    schema_file: Optional[Path] = None,
+    stage: Optional[str] = None,
+    max_workers: int = 1,
+    typed: bool = False,
+    pipelined: bool = False,
+    queue_size: int = 2,
+    run_id: Optional[str] = None,
+    cache: Optional[ParquetCache] = None,
+    cache_refresh: bool = False,
+    key_batch_size: int = 5_000,
+    store_column: str = "store_id"
 ):
     """
     Run a simple ELT pipeline from a source database to Snowflake.
 
-    Depending on the table type ("dimension" or "fact"), this function 
-    extracts data from the source, transforms it if necessary (via custom 
-    queries for fact tables), and then loads it into Snowflake. 
+    Depending on the table type ("dimension" or "fact"), this function
+    extracts data from the source, transforms it if necessary (via custom
+    queries for fact tables), and then loads it into Snowflake. How each
+    table is extracted and loaded is set by its `TableConfig`.
 
-    - For **dimension tables**: if a SQL file is empty, data is extracted 
-      directly from the source table. If it contains a query, that query is 
+    - For **dimension tables**: if a SQL file is empty, data is extracted
+      directly from the source table. If it contains a query, that query is
       used for extraction.
-    - For **fact tables**: a SQL query must be provided in the `.sql` file. 
-      The query can include placeholders `{prev_ds}` and `{ds}` which will 
-      be substituted.
+    - For **fact tables**: a SQL query must be provided in the `.sql` file.
+      It may use the bound placeholders `{window_start}`, `{window_end}`,
+      `{prev_ds}` and `{ds}`. The window is half-open, `[prev_ds, ds)` (the
+      day before `ds` without `prev_ds`), widened by `lookback_days`.
+
+    With `run_id` set, progress is checkpointed per table and per chunk in
+    `<schema>.etl_checkpoint`, and an Airflow retry skips finished tables
+    and resumes streamed tables with a single merge key after the last
+    committed key. Header tables are re-extracted in full instead, so their
+    line tables still get every key. With `max_workers > 1` tables run concurrently, capped by
+    the engines' pool capacity; failures are raised only after every table
+    has settled. `source_conn` may be `{store_id: engine}` to extract every
+    table from several stores at once, tagging rows with `store_column`.
+    Every table must then declare `store_column` in `schema_file`, otherwise
+    a ValueError is raised before anything is extracted.
 
     Args:
         path_file (Path): Path directory containing `.sql` files.
-        source_conn (Engine): SQLAlchemy Engine or active connection 
-            to the source database.
-        snowflake_conn (Engine): SQLAlchemy Engine or active connection 
-            to Snowflake.
+        source_conn (Engine or dict): Source Engine (or `LazyEngine`), or
+            `{store_id: engine}` for several stores with the same schema.
+        snowflake_conn (Engine): Snowflake Engine (or `LazyEngine`).
+        prev_ds (str, optional): Start of the fact window.
+        ds (str, optional): End of the fact window and cache partition.
         schema (str, optional): Target Snowflake schema. Defaults to `"RAW"`.
-        type (str, optional): Table type, must be `"dimension"` or `"fact"`. 
-            Defaults to `"dimension"`.
+        type (str, optional): `"dimension"` or `"fact"`. Defaults to `"dimension"`.
+        chunksize (int, optional): Rows per extracted batch; None extracts
+            each table as one DataFrame.
+        config (dict, optional): `TableConfig` per table name.
+        defaults (TableConfig, optional): Config of tables not in `config`.
+        tables (List[str], optional): Only process these tables of `path_file`.
+        schema_file (Path, optional): Landing DDL, source of merge keys and
+            typed-extraction column types.
+        stage (str, optional): Stage for the `"copy"` loader.
+        max_workers (int, optional): Tables processed at the same time.
+            Defaults to 1 (sequential, stops at the first failure).
+        typed (bool, optional): Extract into compact dtypes derived from
+            `schema_file` and encode low-cardinality VARCHAR columns as
+            `category`, for every loader. See `transform.read_dtypes` and
+            `transform.encode_categories`.
+        pipelined (bool, optional): Overlap extraction and load through a
+            queue of `queue_size` batches. Requires `chunksize`.
+        queue_size (int, optional): Batches buffered when pipelined.
+        run_id (str, optional): Airflow `run_id`, enables checkpoints.
+        cache (ParquetCache, optional): Local landing cache, used when `ds` is given.
+        cache_refresh (bool, optional): Re-extract even when a partition is cached.
+        key_batch_size (int, optional): Header keys per line-table query.
+        store_column (str, optional): Store tag column in multi-store mode.
 
     Returns:
-        None
+        Dict[str, dict]: Outcome per table, e.g.
+        `{"sales": {"status": "success", "rows": 120, "seconds": 3.2}}`.
+        Failed tables carry `"status": "failed"` and an `"error"`; skipped
+        tables carry `"status": "skipped"` and a `"reason"`.
+
+    Raises:
+        ValueError: If `type` is unknown, a watermark column is a merge key,
+            or a multi-store table has no `store_column` in `schema_file`.
+        AirflowFailException: If one or more tables failed in concurrent mode.
+
+    Example:
+        >>> elt_pipeline(
+        ...     Path("include/sql/fact"), mysql_engine, snowflake_engine,
+        ...     prev_ds="2025-09-24", ds="2025-09-25", schema="landing", type="fact",
+        ...     chunksize=50_000, schema_file=Path("include/sql/create_schema.sql"),
+        ...     config={"sales": TableConfig(loader="copy", mode="merge", window_column="sale_date")},
+        ... )
     """
-    
-    sql_files = list(path_file.glob("*.sql"))
 
-    if type == "dimension":
-        for sql_file in sql_files:
-            table_name = sql_file.stem
-            sql_text = sql_file.read_text().strip()
+    if type not in ("dimension", "fact"):
+        raise ValueError("type harus 'dimension' atau 'fact'")
+
+    multi_store = isinstance(source_conn, dict)
+    if multi_store:
+        sources = {store: resolve_engine(engine) for store, engine in source_conn.items()}
+    else:
+        sources = {None: resolve_engine(source_conn)}
+    snowflake_conn = resolve_engine(snowflake_conn)
+
+    config = config or {}
+
+    def table_config(table_name: str) -> TableConfig:
+        return config.get(table_name, defaults)
+
+    parents = {table: options.parent for table, options in config.items() if options.parent}
+    sql_files = [f for f in path_file.glob("*.sql") if tables is None or f.stem in tables]
+    missing = set(tables or []) - {f.stem for f in sql_files}
+    if missing:
+        raise FileNotFoundError(f"File SQL tidak ditemukan untuk tabel {sorted(missing)} di {path_file}")
+    sql_files = _parents_first(sql_files, parents)
+    key_futures = {
+        parent: (column, Future())
+        for parent, column in parents.values()
+        if any(f.stem == parent for f in sql_files)
+    }
+    table_schema = read_table_schema(schema_file) if schema_file else {}
+
+    if multi_store:
+        # tag store_id hanya berguna bila landing, merge key dan model dbt sudah punya kolomnya
+        untagged = [
+            f.stem for f in sql_files
+            if store_column not in table_schema.get(f.stem.lower(), {}).get("columns", {})
+        ]
+        if untagged:
+            raise ValueError(
+                f"Multi-store butuh kolom {store_column} di DDL landing (schema_file) untuk tabel {untagged}; "
+                f"tambahkan kolom itu ke DDL, primary key dan model dbt sebelum memakai lebih dari satu store"
+            )
+
+    def merge_keys(table_name: str) -> Optional[List[str]]:
+        keys = table_config(table_name).key_columns
+        if keys is None and table_name in table_schema:
+            keys = table_schema[table_name]["primary_key"] or None
+        if keys and multi_store and store_column not in keys:
+            keys = [store_column, *keys]
+        return keys
+
+    for table_name in (f.stem for f in sql_files):
+        options = table_config(table_name)
+        if options.watermark and options.watermark in (merge_keys(table_name) or []):
+            raise ValueError(
+                f"Watermark {table_name}.{options.watermark} adalah key, bukan kolom perubahan (mis. updated_at): "
+                "update baris lama tidak akan pernah terbaca"
+            )
+
+    checkpoints = load_checkpoints(snowflake_conn, run_id, schema) if run_id else {}
+
+    def run_table(sql_file: Path) -> dict:
+        try:
+            with ExitStack() as cleanup:
+                return load_table(sql_file, cleanup)
+        finally:
+            if sql_file.stem in key_futures:
+                _resolve(key_futures[sql_file.stem][1], None)
+
+    def load_table(sql_file: Path, cleanup: ExitStack) -> dict:
+        table_name = sql_file.stem
+        options = table_config(table_name)
+        progress = checkpoints.get(table_name, {})
+        if progress.get("done"):
+            logging.info(f"[PIPELINE] Table={table_name} sudah selesai di run {run_id}, dilewati")
+            # rows dari run sebelumnya: tabel tetap dihitung berubah untuk dbt
+            return {"status": "skipped", "rows": progress.get("rows", 0), "reason": "checkpoint"}
+
+        window = _window(prev_ds, ds, options.lookback_days)
+        query, params = _build_query(sql_file, type, prev_ds, ds, window)
+
+        keys_by_store = None
+        if table_name in parents:
+            parent_table = parents[table_name][0]
+            if parent_table in key_futures:
+                keys_by_store = key_futures[parent_table][1].result()
+            if keys_by_store is None:
+                logging.info(f"[PIPELINE] Table={table_name}: key {parent_table} tidak tersedia, pakai query sendiri")
+            else:
+                keyed_query, keyed_params = _build_query(sql_file.parent / "by_parent" / sql_file.name, type, prev_ds, ds, window)
+
+        fingerprint = None
+        detect_changes = options.skip_unchanged
+        if detect_changes and query is None:
+            fingerprint = _combine_fingerprints({
+                store: fingerprint_table(table_name, engine) for store, engine in sources.items()
+            })
+            if fingerprint is not None and fingerprint == get_fingerprint(table_name):
+                logging.info(f"[PIPELINE] Table={table_name} tidak berubah, dilewati")
+                return {"status": "skipped", "rows": 0, "reason": "unchanged"}
 
-            if not sql_text:
-                df = extract_from_source(table_name, source_conn)
+        watermark_column = options.watermark
+        table_loader = options.loader
+        table_mode = "merge" if watermark_column else options.mode
+
+        # resume per chunk hanya bila urutan extract bisa diulang: ORDER BY key tunggal.
+        # Tabel header tidak di-resume: key-nya harus lengkap untuk tabel line-nya
+        resume_key = None
+        if (
+            run_id and chunksize and len(sources) == 1 and keys_by_store is None
+            and options.shards <= 1 and table_name not in key_futures
+            and table_loader == "insert" and table_mode in ("truncate", "merge")
+        ):
+            keys = merge_keys(table_name) or []
+            resume_key = keys[0] if len(keys) == 1 else None
+        last_key = progress.get("last_key") if resume_key else None
+        resume_after = progress.get("chunk", 0) if last_key is not None else 0
+
+        column_types = table_schema.get(table_name, {}).get("columns", {})
+        typed_columns = None
+        if typed and (column_types or options.dtypes):
+            typed_columns = read_dtypes(column_types, options.dtypes)
+
+        collected = {} if table_name in key_futures else None
+        highs = {}
+
+        def extract_store(store, engine):
+            label = _store_state(table_name, store)
+            parent_keys = keys_by_store.get(store) if keys_by_store else None
+            store_query, store_params = (keyed_query, keyed_params) if parent_keys is not None else (query, params)
+
+            if watermark_column:
+                mark = get_watermark(label, watermark_column)
+                if mark is not None:
+                    store_query = _filter_query(store_query, table_name, f"{watermark_column} > :watermark")
+                    store_params = {**store_params, "watermark": mark}
+
+            if resume_key:
+                if last_key is None:
+                    store_query = _filter_query(store_query, table_name, order_by=resume_key)
+                else:
+                    store_query = _filter_query(store_query, table_name, f"{resume_key} > :resume_key", order_by=resume_key)
+                    store_params = {**store_params, "resume_key": last_key}
+                    logging.info(f"[PIPELINE] Table={table_name} lanjut setelah {resume_key}={last_key} (chunk {resume_after})")
+
+            if store_query is None and store is not None:
+                store_query = f"SELECT * FROM {table_name}"
+
+            frames = extract_from_source(
+                label,
+                engine,
+                query=store_query,
+                chunksize=chunksize,
+                shards=options.shards,
+                shard_key=options.shard_key,
+                params=store_params or None,
+                cache=None if last_key is not None else cache,
+                cache_partition=ds,
+                cache_refresh=cache_refresh,
+                parent_keys=parent_keys,
+                key_batch_size=key_batch_size,
+                dtype=typed_columns,
+            )
+
+            if collected is not None:
+                frames = _collect_keys(frames, key_futures[table_name][0], collected.setdefault(store, set()))
+            if watermark_column:
+                frames = _track_max(frames, watermark_column, highs.setdefault(store, {}))
+            if typed_columns is not None:
+                frames = _map_frames(frames, lambda frame: encode_categories(frame, column_types, table_name=label))
+            if store is not None:
+                frames = _map_frames(frames, lambda frame: frame.assign(**{store_column: store}))
+            return frames
+
+        if len(sources) == 1:
+            df = extract_store(*next(iter(sources.items())))
+        else:
+            df = fan_in(
+                [_lazy_frames(extract_store, store, engine) for store, engine in sources.items()],
+                maxsize=len(sources),
+                name=f"extract_{table_name}",
+            )
+            if not chunksize:
+                df = pd.concat(list(df), ignore_index=True)
+            logging.info(f"[PIPELINE] Table={table_name}, Stores={list(sources)}")
+
+        if collected is not None:
+            df = _resolve_when_done(df, key_futures[table_name][1], collected)
+
+        if detect_changes and fingerprint is None:
+            hashed = {}
+            if isinstance(df, pd.DataFrame):
+                list(fingerprint_frames(df, hashed))
             else:
-                df = extract_from_source(table_name, source_conn, query=sql_text)
-
-            load_to_snowflake(
-                df=df,
-                conn_snowflake=snowflake_conn,
-                table_name=table_name,
-                schema=schema,
-                method=insert_snowflake,
+                # stream di-hash sambil ditulis ke Parquet lokal, lalu diputar ulang bila berubah
+                spool = Path(cleanup.enter_context(tempfile.TemporaryDirectory(prefix=f"etl_{table_name}_")))
+                files, _ = write_parquet_files(fingerprint_frames(df, hashed), spool, table_name)
+                df = _replay(files, typed=bool(typed_columns))
+            fingerprint = hashed["fingerprint"]
+            if fingerprint == get_fingerprint(table_name):
+                logging.info(f"[PIPELINE] Table={table_name} tidak berubah, dilewati")
+                return {"status": "skipped", "rows": 0, "reason": "unchanged"}
+
+        stages = None
+        if pipelined and chunksize:
+            stages = {}
+            df = fan_in([df], maxsize=queue_size, name=f"extract_{table_name}", stats=stages)
+
+        delete_window = None
+        if table_mode == "merge" and options.window_column and window:
+            delete_window = (options.window_column, *window)
+
+        checkpoint = None
+        if resume_key:
+            checkpoint = lambda conn, chunk_no, frame: save_checkpoint(
+                conn, run_id, table_name, chunk_no, len(frame), schema=schema,
+                last_key=frame[resume_key].max() if len(frame) else None
             )
 
-    elif type == "fact":
+        rows = load_to_snowflake(
+            df=df,
+            conn_snowflake=snowflake_conn,
+            table_name=table_name,
+            schema=schema,
+            method=insert_snowflake,
+            loader=table_loader,
+            stage=stage,
+            mode=table_mode,
+            key_columns=merge_keys(table_name),
+            delete_window=delete_window,
+            checkpoint=checkpoint,
+            resume_after=resume_after,
+        )
+
+        if run_id:
+            with snowflake_conn.begin() as conn:
+                save_checkpoint(conn, run_id, table_name, 0, rows, status="done", schema=schema)
+
+        for store, high in highs.items():
+            if high.get("max") is not None:
+                set_watermark(_store_state(table_name, store), watermark_column, high["max"])
+
+        if fingerprint is not None:
+            set_fingerprint(table_name, fingerprint)
+
+        if stages is None:
+            return {"rows": rows}
+        return {"rows": rows, "stages": _stage_report(table_name, stages)}
+
+    def run_table_settled(sql_file: Path) -> dict:
+        start = time.perf_counter()
+        try:
+            return _outcome(start, run_table(sql_file))
+        except Exception as e:
+            logging.error(f"[PIPELINE] Table={sql_file.stem} gagal: {e}")
+            return _outcome(start, {"error": str(e)}, status="failed")
+
+    workers = _bounded_workers(max_workers, len(sql_files), *sources.values(), snowflake_conn)
+    outcomes = {}
+
+    if workers <= 1:
         for sql_file in sql_files:
-            table_name = sql_file.stem
-            sql_text = sql_file.read_text().strip()
+            start = time.perf_counter()
+            outcomes[sql_file.stem] = _outcome(start, run_table(sql_file))
+        return outcomes
+
+    logging.info(f"[PIPELINE] Type={type}, Tables={len(sql_files)}, Workers={workers}")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"elt_{type}") as executor:
+        futures = {executor.submit(run_table_settled, f): f.stem for f in sql_files}
+        for future in as_completed(futures):
+            outcomes[futures[future]] = future.result()
+
+    failed = sorted(t for t, o in outcomes.items() if o["status"] == "failed")
+    logging.info(f"[PIPELINE] Type={type}, Outcomes={outcomes}")
+    if failed:
+        raise AirflowFailException(f"[PIPELINE ERROR] Table gagal: {', '.join(failed)}")
 
-            if not sql_text:
-                raise ValueError(f"Query kosong di file {sql_file}")
+    return outcomes
 
-            # Replace placeholders (Airflow-style macros bisa masuk di sini)
-            formatted_sql = sql_text.format(prev_ds=prev_ds, ds=ds)
+def changed_tables(outcomes: Dict[str, dict]) -> List[str]:
+    """
+    List the tables of an `elt_pipeline` result that received new rows.
+
+    Tables skipped by their checkpoint count with the rows loaded by the
+    earlier attempt of the same run, so a retry still rebuilds what that
+    attempt loaded. Tables skipped as unchanged, failed tables and loads
+    of zero rows are left out.
+
+    Example:
+        >>> changed_tables({
+        ...     "sales": {"status": "success", "rows": 120},
+        ...     "orders": {"status": "skipped", "rows": 40, "reason": "checkpoint"},
+        ...     "stock": {"status": "success", "rows": 0},
+        ... })
+        ['orders', 'sales']
+    """
+    return sorted(
+        table for table, outcome in outcomes.items()
+        if (outcome.get("status") == "success" or outcome.get("reason") == "checkpoint")
+        and outcome.get("rows", 0) > 0
+    )
 
-            df = extract_from_source(table_name, source_conn, query=formatted_sql)
+def _outcome(start: float, fields: dict, status: str = "success") -> dict:
+    return {"status": status, "seconds": round(time.perf_counter() - start, 2), **fields}
+
+def _stage_report(table_name: str, stats: Dict[str, float]) -> dict:
+    """
+    Summarise extract/load busy and wait time and name the bottleneck stage.
+    """
+    report = {
+        "extract_busy": round(stats["producer_busy"], 2),
+        "extract_wait": round(stats["producer_wait"], 2),
+        "load_busy": round(stats["consumer_busy"], 2),
+        "load_wait": round(stats["consumer_wait"], 2),
+    }
+    report["bottleneck"] = "load" if report["extract_wait"] > report["load_wait"] else "extract"
+    logging.info(f"[PIPELINE] Table={table_name}, Stages={report}")
+    return report
 
-            load_to_snowflake(
-                df=df,
-                conn_snowflake=snowflake_conn,
-                table_name=table_name,
-                schema=schema,
-                method=insert_snowflake,
+def _bounded_workers(max_workers: int, n_tables: int, *engines: Engine) -> int:
+    """
+    Cap the requested parallelism by table count and engine pool capacity.
+    """
+    workers = min(max_workers, n_tables)
+    for engine in engines:
+        capacity = engine_capacity(engine)
+        if capacity is not None and capacity < workers:
+            logging.warning(
+                f"[PIPELINE] max_workers={max_workers} dibatasi kapasitas pool {capacity}"
             )
+            workers = capacity
+    return max(workers, 1)
 
-    else:
-        raise ValueError("type harus 'dimension' atau 'fact'")
+def _filter_query(
+    query: Optional[str],
+    table_name: str,
+    predicate: Optional[str] = None,
+    order_by: Optional[str] = None
+) -> str:
+    """
+    Wrap an extraction query (or the whole table) with an extra WHERE predicate
+    and/or ORDER BY.
+    """
+    base = (query or f"SELECT * FROM {table_name}").strip().rstrip(";")
+    sql = f"SELECT * FROM ({base}) AS _src"
+    if predicate:
+        sql += f" WHERE {predicate}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return sql
+
+def _map_frames(frames, func):
+    """
+    Apply `func` to a DataFrame, or lazily to every frame of an iterator.
+    """
+    if isinstance(frames, pd.DataFrame):
+        return func(frames)
+    return (func(frame) for frame in frames)
+
+def _replay(files: List[Path], typed: bool = False):
+    """
+    Read spooled Parquet batches back one at a time.
+    """
+    for path in files:
+        yield pd.read_parquet(path, **({"dtype_backend": "pyarrow"} if typed else {}))
+
+def _parents_first(sql_files: List[Path], parents: Dict[str, Tuple[str, str]]) -> List[Path]:
+    """
+    Order header tables before line tables, so a line table waiting for its
+    header's keys never holds a worker the header is still queued for.
+    """
+    headers = {parent for parent, _ in parents.values()}
+    return sorted(sql_files, key=lambda f: (f.stem in parents, f.stem not in headers))
+
+def _resolve(future: Future, value):
+    """
+    Set the result of `future` unless it already has one.
+    """
+    try:
+        future.set_result(value)
+    except InvalidStateError:
+        pass
+
+def _collect_keys(frames, column: str, keys: set):
+    """
+    Pass frames through, adding the distinct values of `column` to `keys`.
+    """
+    for frame in ([frames] if isinstance(frames, pd.DataFrame) else frames):
+        keys.update(frame[column].dropna().tolist())
+        yield frame
+
+def _resolve_when_done(frames, future: Future, value):
+    """
+    Pass frames through and resolve `future` with `value` once they are exhausted.
+    """
+    for frame in ([frames] if isinstance(frames, pd.DataFrame) else frames):
+        yield frame
+    _resolve(future, value)
+
+def _lazy_frames(extract, *args):
+    """
+    Defer `extract(*args)` until first iterated, i.e. on a `fan_in` producer thread.
+    """
+    frames = extract(*args)
+    yield from ([frames] if isinstance(frames, pd.DataFrame) else frames)
+
+def _store_state(table_name: str, store) -> str:
+    """
+    Name under which per-store state (watermark, cache) of a table is kept.
+    """
+    return table_name if store is None else f"{table_name}__{store}"
+
+def _combine_fingerprints(fingerprints: dict) -> Optional[str]:
+    """
+    Combine per-store fingerprints; None if any store has none.
+    """
+    if any(value is None for value in fingerprints.values()):
+        return None
+    if list(fingerprints) == [None]:
+        return fingerprints[None]
+    return "|".join(f"{store}={value}" for store, value in sorted(fingerprints.items()))
+
+def _track_max(frames, column: str, high: dict):
+    """
+    Pass frames through, recording the maximum of `column` in `high["max"]`.
+    """
+    for frame in ([frames] if isinstance(frames, pd.DataFrame) else frames):
+        if not frame.empty:
+            value = frame[column].max()
+            if high.get("max") is None or value > high["max"]:
+                high["max"] = value
+        yield frame
+
+def _window(prev_ds, ds, lookback_days: int = 0) -> Optional[Tuple[str, str]]:
+    """
+    Half-open extraction window `[start, end)` as ISO dates, or None without `ds`.
+    """
+    if ds is None:
+        return None
+    end = datetime.date.fromisoformat(str(ds))
+    start = datetime.date.fromisoformat(str(prev_ds)) if prev_ds else end - datetime.timedelta(days=1)
+    start -= datetime.timedelta(days=lookback_days)
+    return start.isoformat(), end.isoformat()
+
+def _build_query(sql_file: Path, type: str, prev_ds, ds, window: Optional[Tuple[str, str]] = None) -> Tuple[Optional[str], dict]:
+    """
+    Get the extraction query of a table and its bound parameter values.
+
+    Returns `(None, {})` for an empty dimension file, so the whole source
+    table is extracted.
+    """
+    template = load_template(sql_file)
+
+    if type == "dimension":
+        return template.sql, template.bind()
+
+    if template.sql is None:
+        raise ValueError(f"Query kosong di file {sql_file}")
+
+    window_start, window_end = window or (None, None)
+    return template.sql, template.bind(
+        prev_ds=prev_ds, ds=ds, window_start=window_start, window_end=window_end
+    )
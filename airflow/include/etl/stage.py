@@ -0,0 +1,162 @@
+import logging
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+
+import pandas as pd
+from sqlalchemy.engine import Connection, Engine
+
+
+def is_local_stage(stage: Union[str, Path]) -> bool:
+    """
+    Check whether a stage points to the local filesystem.
+
+    Snowflake stages are referenced with an `@` prefix (`@%products`,
+    `@LANDING.MY_STAGE`). Anything else (`file:///tmp/stage`, a plain
+    path or a `Path` object) is treated as a filesystem stage, which is
+    used for local testing without a Snowflake account.
+
+    Args:
+        stage (str or Path): Stage reference.
+
+    Returns:
+        bool: True if the stage is a filesystem directory.
+    """
+    return isinstance(stage, Path) or not str(stage).startswith("@")
+
+def _local_stage_path(stage: Union[str, Path]) -> Path:
+    stage = str(stage)
+    if stage.startswith("file://"):
+        stage = stage[len("file://"):]
+    return Path(stage)
+
+def table_stage(table_name: str, schema: str) -> str:
+    """
+    Return the Snowflake table stage reference for a table, e.g. `@LANDING.%products`.
+    """
+    return f"@{schema}.%{table_name}"
+
+def write_parquet_files(
+    frames: Iterable[pd.DataFrame],
+    directory: Path,
+    table_name: str,
+    compression: str = "snappy"
+) -> Tuple[List[Path], int]:
+    """
+    Write DataFrames to compressed Parquet files, one file per batch.
+
+    Each batch is written and released before the next one is pulled
+    from `frames`, so streaming extracts keep a bounded memory footprint.
+
+    Args:
+        frames (Iterable[pd.DataFrame]): Batches to write.
+        directory (Path): Local directory for the Parquet files.
+        table_name (str): Table name, used as file name prefix.
+        compression (str, optional): Parquet compression codec.
+            Defaults to `"snappy"`.
+
+    Returns:
+        Tuple[List[Path], int]: Written file paths and total row count.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+
+    files = []
+    row_count = 0
+    for i, frame in enumerate(frames):
+        if frame.empty:
+            continue
+        path = directory / f"{table_name}_{i:05d}.parquet"
+        frame.to_parquet(path, compression=compression, index=False)
+        files.append(path)
+        row_count += len(frame)
+
+    logging.info(f"[STAGE] Table={table_name}, Files={len(files)}, Rows={row_count}")
+    return files, row_count
+
+def put_to_stage(
+    conn: Union[Engine, Connection],
+    files: List[Path],
+    stage: Union[str, Path],
+    prefix: str
+):
+    """
+    Upload local files to a Snowflake stage (or filesystem stage) under a prefix.
+
+    Args:
+        conn (Engine or Connection): Snowflake Engine or connection. Ignored
+            for filesystem stages.
+        files (List[Path]): Local files to upload.
+        stage (str or Path): Stage reference, see `is_local_stage`.
+        prefix (str): Sub-path inside the stage, unique per load.
+
+    Returns:
+        None
+    """
+    if is_local_stage(stage):
+        target = _local_stage_path(stage) / prefix
+        target.mkdir(parents=True, exist_ok=True)
+        for path in files:
+            shutil.copy2(path, target / path.name)
+    else:
+        for path in files:
+            conn.execute(
+                f"PUT 'file://{path.as_posix()}' {stage}/{prefix} "
+                "AUTO_COMPRESS=FALSE OVERWRITE=TRUE"
+            )
+
+    logging.info(f"[STAGE] PUT Files={len(files)} -> {stage}/{prefix}")
+
+def copy_into(
+    conn: Connection,
+    table_name: str,
+    schema: str,
+    stage: Union[str, Path],
+    prefix: str
+):
+    """
+    Run `COPY INTO <schema>.<table>` from staged Parquet files and purge them.
+
+    For a filesystem stage the files are read back with Pandas and appended
+    through the same connection, which lets the stage/COPY path be tested
+    against any SQLAlchemy database.
+
+    Args:
+        conn (Connection): Active connection, usually inside the load transaction.
+        table_name (str): Target table name.
+        schema (str): Target schema.
+        stage (str or Path): Stage reference, see `is_local_stage`.
+        prefix (str): Sub-path inside the stage written by `put_to_stage`.
+
+    Returns:
+        None
+    """
+    if is_local_stage(stage):
+        source = _local_stage_path(stage) / prefix
+        for path in sorted(source.glob("*.parquet")):
+            pd.read_parquet(path).to_sql(
+                name=table_name,
+                con=conn,
+                schema=schema,
+                index=False,
+                if_exists="append"
+            )
+        shutil.rmtree(source, ignore_errors=True)
+    else:
+        conn.execute(
+            f"COPY INTO {schema}.{table_name} FROM {stage}/{prefix}/ "
+            "FILE_FORMAT = (TYPE = PARQUET) "
+            "MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE "
+            "PURGE = TRUE"
+        )
+
+    logging.info(f"[STAGE] COPY INTO {schema}.{table_name} FROM {stage}/{prefix}")
+
+def new_stage_prefix(table_name: str) -> str:
+    """
+    Return a unique stage sub-path for one load of a table.
+    """
+    return f"{table_name}/{uuid.uuid4().hex}"
+
+if __name__ == "__main__":
+    pass
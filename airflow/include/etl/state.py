@@ -0,0 +1,187 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from airflow.models import Variable
+
+
+WATERMARK_PREFIX = "etl_watermark__"
+FINGERPRINT_PREFIX = "etl_fingerprint__"
+CHECKPOINT_TABLE = "etl_checkpoint"
+
+
+def get_watermark(table_name: str, column: str) -> Optional[Any]:
+    """
+    Read the high-water mark of a table from an Airflow Variable.
+
+    The mark is stored per table in `etl_watermark__<table_name>` as
+    `{"column": ..., "value": ...}`. A mark recorded for a different
+    column is ignored, so changing the watermark column of a table
+    triggers a full extraction instead of a wrong filter.
+
+    Args:
+        table_name (str): Source table name.
+        column (str): Watermark column (max PK or an `updated_at` column).
+
+    Returns:
+        Any or None: The stored mark, or None if the table has none yet.
+
+    Example:
+        >>> get_watermark("products", "product_id")
+        42
+    """
+    state = Variable.get(f"{WATERMARK_PREFIX}{table_name}", default_var=None, deserialize_json=True)
+    if not state or state.get("column") != column:
+        return None
+    return state.get("value")
+
+def set_watermark(table_name: str, column: str, value: Any):
+    """
+    Store the high-water mark of a table in an Airflow Variable.
+
+    Dates and timestamps are stored as ISO strings, which MySQL and
+    PostgreSQL compare correctly against DATE/DATETIME columns.
+
+    Args:
+        table_name (str): Source table name.
+        column (str): Watermark column.
+        value (Any): New mark, usually the max of `column` in the last load.
+
+    Returns:
+        None
+    """
+    value = _plain(value)
+    Variable.set(
+        f"{WATERMARK_PREFIX}{table_name}",
+        json.dumps({"column": column, "value": value}),
+    )
+    logging.info(f"[STATE] Watermark Table={table_name}, Column={column}, Value={value}")
+
+def get_fingerprint(table_name: str) -> Optional[str]:
+    """
+    Read the fingerprint of the last successful load of a table.
+
+    Args:
+        table_name (str): Source table name.
+
+    Returns:
+        str or None: Stored fingerprint from `etl_fingerprint__<table_name>`.
+    """
+    return Variable.get(f"{FINGERPRINT_PREFIX}{table_name}", default_var=None)
+
+def set_fingerprint(table_name: str, fingerprint: str):
+    """
+    Store the fingerprint of a table after a successful load.
+
+    Args:
+        table_name (str): Source table name.
+        fingerprint (str): Value from `fingerprint_table` or `fingerprint_frames`.
+
+    Returns:
+        None
+    """
+    Variable.set(f"{FINGERPRINT_PREFIX}{table_name}", fingerprint)
+    logging.info(f"[STATE] Fingerprint Table={table_name}, Value={fingerprint}")
+
+def _plain(value: Any) -> Any:
+    """
+    Turn numpy scalars, dates and timestamps into JSON-friendly values.
+    """
+    if hasattr(value, "isoformat"):
+        return value.isoformat(sep=" ") if hasattr(value, "hour") else value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+def load_checkpoints(engine: Engine, run_id: str, schema: str = "LANDING") -> Dict[str, dict]:
+    """
+    Read the checkpoints recorded for a DAG run.
+
+    Checkpoints live in `<schema>.etl_checkpoint` (see
+    `include/sql/create_schema.sql`) and are written in the same
+    transaction as the data they describe, so a committed checkpoint
+    always means the chunk is really in the landing table. Chunk
+    checkpoints carry the last key loaded with the chunk, from which a
+    retry resumes; the "done" checkpoint carries the rows loaded into the
+    table in that run.
+
+    Args:
+        engine (Engine): Snowflake Engine.
+        run_id (str): Airflow `run_id` of the DAG run.
+        schema (str, optional): Schema of the checkpoint table. Defaults to `"LANDING"`.
+
+    Returns:
+        Dict[str, dict]: Per table `{"chunk": last committed chunk, "done": bool,
+        "rows": rows of the finished load (0 until done), "last_key": key of
+        the last committed chunk or None}`.
+
+    Example:
+        >>> load_checkpoints(snowflake_engine, "scheduled__2025-09-25T00:00:00+00:00")
+        {'orders': {'chunk': 3, 'done': True, 'rows': 150000, 'last_key': 150000}, 'sales': {'chunk': 1, 'done': False, 'rows': 0, 'last_key': 50000}}
+    """
+    query = text(
+        f"SELECT table_name, chunk_no, row_count, status, last_key "
+        f"FROM {schema}.{CHECKPOINT_TABLE} WHERE run_id = :run_id ORDER BY table_name, chunk_no"
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(query, {"run_id": run_id}).fetchall()
+
+    checkpoints = {}
+    for table_name, chunk_no, row_count, status, last_key in rows:
+        progress = checkpoints.setdefault(table_name, {"chunk": 0, "done": False, "rows": 0, "last_key": None})
+        if status == "done":
+            progress["done"] = True
+            progress["rows"] = int(row_count or 0)
+        elif chunk_no and chunk_no >= progress["chunk"]:
+            progress["chunk"] = int(chunk_no)
+            progress["last_key"] = json.loads(last_key) if last_key is not None else None
+    return checkpoints
+
+def save_checkpoint(
+    conn: Connection,
+    run_id: str,
+    table_name: str,
+    chunk_no: int,
+    row_count: int,
+    status: str = "chunk",
+    schema: str = "LANDING",
+    last_key: Any = None
+):
+    """
+    Record a committed chunk (or a finished table) for a DAG run.
+
+    Call it on the connection of the load transaction so the checkpoint
+    commits or rolls back together with the data.
+
+    Args:
+        conn (Connection): Active connection inside the load transaction.
+        run_id (str): Airflow `run_id` of the DAG run.
+        table_name (str): Landing table name.
+        chunk_no (int): 1-based chunk number (0 for table-level entries).
+        row_count (int): Rows in the chunk (or in the whole table).
+        status (str, optional): `"chunk"` or `"done"`. Defaults to `"chunk"`.
+        schema (str, optional): Schema of the checkpoint table. Defaults to `"LANDING"`.
+        last_key (Any, optional): Highest resume key in the chunk, stored as JSON.
+
+    Returns:
+        None
+    """
+    conn.execute(
+        text(
+            f"INSERT INTO {schema}.{CHECKPOINT_TABLE} (run_id, table_name, chunk_no, row_count, status, last_key) "
+            "VALUES (:run_id, :table_name, :chunk_no, :row_count, :status, :last_key)"
+        ),
+        {
+            "run_id": run_id,
+            "table_name": table_name,
+            "chunk_no": chunk_no,
+            "row_count": row_count,
+            "status": status,
+            "last_key": None if last_key is None else json.dumps(_plain(last_key)),
+        },
+    )
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,118 @@
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+# '{ds}' atau {ds} -> :ds
+_PLACEHOLDER = re.compile(r"'?\{(\w+)\}'?")
+
+
+class SqlTemplate(NamedTuple):
+    """
+    A compiled `.sql` file: the query with `:name` bound parameters and
+    the parameter names it expects.
+    """
+    path: Path
+    mtime_ns: int
+    sql: Optional[str]
+    params: Tuple[str, ...]
+
+    def bind(self, **values) -> Dict[str, object]:
+        """
+        Pick the values of this template's parameters.
+
+        Raises:
+            ValueError: If a parameter of the template has no value.
+        """
+        missing = [name for name in self.params if values.get(name) is None]
+        if missing:
+            raise ValueError(f"Parameter {missing} wajib diisi untuk {self.path}")
+        return {name: values[name] for name in self.params}
+
+_registry: Dict[Path, SqlTemplate] = {}
+_lock = threading.Lock()
+
+
+def compile_sql(sql_text: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Turn `str.format`-style placeholders into SQLAlchemy bound parameters.
+
+    Quoted (`'{ds}'`) and bare (`{ds}`) placeholders both become `:ds`, so
+    the query text no longer changes between runs and values are sent as
+    parameters instead of being spliced into the SQL. A trailing `;` is
+    removed so the query can be wrapped in a subquery.
+
+    Args:
+        sql_text (str): Raw content of a `.sql` file.
+
+    Returns:
+        Tuple[str, Tuple[str, ...]]: The converted query and its parameter
+        names in order of first appearance.
+
+    Example:
+        >>> compile_sql("SELECT * FROM sales WHERE sale_date BETWEEN '{prev_ds}' AND '{ds}';")
+        ('SELECT * FROM sales WHERE sale_date BETWEEN :prev_ds AND :ds', ('prev_ds', 'ds'))
+    """
+    names = []
+
+    def to_bind(match):
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f":{name}"
+
+    sql = _PLACEHOLDER.sub(to_bind, sql_text.strip().rstrip(";").strip())
+    return sql, tuple(names)
+
+def load_template(path: Path) -> SqlTemplate:
+    """
+    Load a `.sql` file from the process-wide template registry.
+
+    The file is read and compiled (see `compile_sql`) only the first time
+    it is requested, or again when its mtime changes. The compiled query
+    text does not change between runs, so SQLAlchemy's compiled cache (and
+    the driver's prepared statements, where supported) are reused by every
+    `text()` built from it in the same worker process.
+
+    Args:
+        path (Path): Path of the `.sql` file.
+
+    Returns:
+        SqlTemplate: Compiled template; `sql` is None for an empty file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+
+    Example:
+        >>> template = load_template(Path("include/sql/fact/sales.sql"))
+        >>> template.params
+        ('prev_ds', 'ds')
+        >>> pd.read_sql(text(template.sql), engine, params=template.bind(prev_ds="2025-09-24", ds="2025-09-25"))
+    """
+    path = Path(path)
+    mtime_ns = path.stat().st_mtime_ns
+
+    cached = _registry.get(path)
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        return cached
+
+    with _lock:
+        cached = _registry.get(path)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+
+        sql, params = compile_sql(path.read_text())
+        template = SqlTemplate(
+            path=path,
+            mtime_ns=mtime_ns,
+            sql=sql or None,
+            params=params,
+        )
+        _registry[path] = template
+        logging.info(f"[TEMPLATE] Compile {path.name}, Params={list(params)}")
+        return template
+
+if __name__ == "__main__":
+    pass
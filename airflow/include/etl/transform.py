@@ -0,0 +1,124 @@
+import logging
+import re
+from typing import Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+
+_INTEGER_TYPES = {
+    "TINYINT": pa.int8(),
+    "SMALLINT": pa.int16(),
+    "INT": pa.int32(),
+    "INTEGER": pa.int32(),
+    "BIGINT": pa.int64(),
+}
+
+_STRING_TYPES = re.compile(r"(VARCHAR|CHAR|TEXT|STRING)\b")
+
+def _memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+def read_dtypes(
+    column_types: Dict[str, str],
+    dtype_map: Optional[Dict[str, str]] = None
+) -> Dict[str, object]:
+    """
+    Derive compact read dtypes from the landing column types.
+
+    The result is meant for extraction with `dtype_backend="pyarrow"` (see
+    the `dtype` option of `extract_from_source`): every batch is decoded
+    straight into Arrow columns and only the listed columns are narrowed,
+    so no intermediate int64/float64/object copy of the batch is built.
+    The landing types (as parsed by `read_table_schema` from
+    `include/sql/create_schema.sql`) map to:
+
+    - TINYINT / SMALLINT / INT / INTEGER / BIGINT: Arrow int8 .. int64.
+    - DECIMAL(p,s) / NUMERIC(p,s) / NUMBER(p,s): exact Arrow `decimal128(p, s)`.
+    - DATE: Arrow `date32`.
+
+    Other types keep the Arrow type of the source column (VARCHAR stays an
+    Arrow string). Columns in `dtype_map` use that Pandas dtype instead.
+
+    Arrow columns go to Parquet as is for the `"copy"` loader. The
+    `"insert"` loader binds them as `int`, `Decimal` and `date` values, so
+    typed batches only stay smaller while they are queued or spooled there.
+
+    Args:
+        column_types (Dict[str, str]): Column name -> SQL type, e.g.
+            `{"price": "DECIMAL(10,2)"}`.
+        dtype_map (Dict[str, str], optional): Column name -> Pandas dtype
+            overrides.
+
+    Returns:
+        Dict[str, object]: Column name -> Pandas dtype.
+
+    Example:
+        >>> schema = read_table_schema(Path("include/sql/create_schema.sql"))
+        >>> read_dtypes(schema["sales"]["columns"])["total_amount"]
+        decimal128(10, 2)[pyarrow]
+    """
+    dtypes = {}
+    for column, sql_type in column_types.items():
+        base = re.match(r"\w+", sql_type).group(0) if sql_type else ""
+        if base in _INTEGER_TYPES:
+            dtypes[column] = pd.ArrowDtype(_INTEGER_TYPES[base])
+        elif base in ("DECIMAL", "NUMERIC", "NUMBER") and "(" in sql_type:
+            precision, scale = (int(x) for x in re.findall(r"\d+", sql_type)[:2])
+            dtypes[column] = pd.ArrowDtype(pa.decimal128(precision, scale))
+        elif base == "DATE":
+            dtypes[column] = pd.ArrowDtype(pa.date32())
+
+    dtypes.update(dtype_map or {})
+    return dtypes
+
+def encode_categories(
+    df: pd.DataFrame,
+    column_types: Dict[str, str],
+    categorical_ratio: float = 0.5,
+    table_name: str = None
+) -> pd.DataFrame:
+    """
+    Encode the low-cardinality VARCHAR columns of a batch as `category`.
+
+    A VARCHAR / CHAR / TEXT column of `column_types` becomes `category` when
+    its distinct values are at most `categorical_ratio` of the rows (e.g.
+    `products.category`, `warehouses.location`). The decision is made per
+    batch. Parquet stores the column dictionary-encoded and `to_sql` binds
+    plain strings, so both loaders accept the result. Memory before and
+    after is logged for every batch.
+
+    Args:
+        df (pd.DataFrame): Extracted batch.
+        column_types (Dict[str, str]): Column name -> SQL type.
+        categorical_ratio (float, optional): Maximum distinct/rows ratio for
+            categorical encoding. Defaults to 0.5.
+        table_name (str, optional): Table name, only used in the log.
+
+    Returns:
+        pd.DataFrame: The batch, with the encoded columns replaced.
+
+    Example:
+        >>> schema = read_table_schema(Path("include/sql/create_schema.sql"))
+        >>> df = encode_categories(df, schema["products"]["columns"], table_name="products")
+    """
+    before = _memory_bytes(df)
+    n_rows = len(df)
+    encoded = {
+        column: df[column].astype("category")
+        for column in df.columns
+        if _STRING_TYPES.match(column_types.get(column.lower(), "") or "")
+        and not isinstance(df[column].dtype, pd.CategoricalDtype)
+        and n_rows and df[column].nunique(dropna=True) / n_rows <= categorical_ratio
+    }
+    typed = df.assign(**encoded) if encoded else df
+
+    after = _memory_bytes(typed)
+    logging.info(
+        f"[TRANSFORM] Table={table_name}, Rows={n_rows}, Categorical={sorted(encoded)}, "
+        f"Memory={before} -> {after} bytes ({(1 - after / before) * 100 if before else 0:.1f}% lebih kecil)"
+    )
+    return typed
+
+if __name__ == "__main__":
+    pass
@@ -1,12 +1,22 @@
+import json
 import logging
+import queue
+import re
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 from docker.types import Mount
 
 from sqlalchemy.engine import Engine
 
+from airflow.providers.docker.exceptions import DockerContainerFailedException
 from airflow.providers.docker.operators.docker import DockerOperator
 from airflow.models import Variable
 
+from .connections import resolve_engine
+
 def create_table_snowflake(snowflake_conn: Engine, file_path: Path):
     """
     Execute a SQL file to create tables in Snowflake.
@@ -43,32 +53,212 @@ def create_table_snowflake(snowflake_conn: Engine, file_path: Path):
     with open(file_path, "r") as f:
         sql = f.read()
 
-    with snowflake_conn.begin() as conn:
+    with resolve_engine(snowflake_conn).begin() as conn:
         for stmt in sql.split(";"):
             if stmt.strip():
                 logging.info(f"[SNOWFLAKE] Eksekusi statement:\n{stmt.strip()}")
                 conn.execute(stmt)
 
-def insert_snowflake(table, conn, keys, data_iter):
+def _split_columns(body: str) -> List[str]:
+    """
+    Split a CREATE TABLE body on top-level commas (not those inside DECIMAL(10,2)).
+    """
+    items, depth, current = [], 0, ""
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            items.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        items.append(current.strip())
+    return items
+
+def read_table_schema(file_path: Path) -> Dict[str, dict]:
+    """
+    Parse the `CREATE TABLE` statements of a DDL file.
+
+    Used to derive merge keys (and column types) from the same file that
+    `create_table_snowflake` executes, so the pipeline never keeps a second
+    copy of the landing schema.
+
+    Args:
+        file_path (Path): Path to the .sql file, e.g. `include/sql/create_schema.sql`.
+
+    Returns:
+        Dict[str, dict]: Per lower-cased table name, `{"columns": {name: type},
+        "primary_key": [names]}`. Types are upper-cased as written, e.g.
+        `"DECIMAL(10,2)"`.
+
+    Raises:
+        FileNotFoundError: If the SQL file does not exist.
+
+    Example:
+        >>> read_table_schema(Path("include/sql/create_schema.sql"))["stock"]["primary_key"]
+        ['warehouse_id', 'product_id']
+    """
+    if not file_path.exists():
+        raise FileNotFoundError(f"File SQL tidak ditemukan: {file_path}")
+
+    sql = re.sub(r"--[^\n]*", "", file_path.read_text())
+    tables = {}
+    for match in re.finditer(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*?)\)\s*;", sql, re.I | re.S):
+        table_name, body = match.group(1).lower(), match.group(2)
+        columns, primary_key = {}, []
+        for item in _split_columns(body):
+            pk = re.match(r"PRIMARY\s+KEY\s*\((.*)\)", item, re.I)
+            if pk:
+                primary_key = [c.strip().lower() for c in pk.group(1).split(",")]
+                continue
+            if re.match(r"(FOREIGN\s+KEY|CONSTRAINT|UNIQUE)\b", item, re.I):
+                continue
+            name, col_type = item.split(None, 2)[:2]
+            columns[name.lower()] = col_type.upper()
+            if re.search(r"PRIMARY\s+KEY", item, re.I):
+                primary_key.append(name.lower())
+        tables[table_name] = {"columns": columns, "primary_key": primary_key}
+    return tables
+
+def plan_fact_groups(
+    schema_file: Path,
+    facts: List[str],
+    dimensions: List[str],
+    parents: Optional[Dict[str, tuple]] = None
+) -> Dict[tuple, List[List[str]]]:
+    """
+    Group fact tables into load units keyed by the dimensions they reference.
+
+    A load unit is a header table together with its line tables (see the
+    `parents` option of `elt_pipeline`), so they keep sharing one header
+    scan. A unit references a dimension when one of its tables has a column
+    named like the dimension's single-column primary key, e.g. `product_id`.
+    Only the DDL file is read, so it is safe to call at DAG parse time.
+
+    Args:
+        schema_file (Path): DDL file, e.g. `include/sql/create_schema.sql`.
+        facts (List[str]): Fact table names.
+        dimensions (List[str]): Dimension table names.
+        parents (dict, optional): Line table -> `(header table, key column)`.
+
+    Returns:
+        Dict[tuple, List[List[str]]]: Sorted referenced dimensions -> load
+        units (header first).
+
+    Example:
+        >>> plan_fact_groups(schema, ["orders", "order_items", "stock"], ["products", "warehouses"],
+        ...                  {"order_items": ("orders", "order_id")})
+        {('products',): [['orders', 'order_items']], ('products', 'warehouses'): [['stock']]}
+    """
+    parents = parents or {}
+    table_schema = read_table_schema(schema_file)
+    dimension_keys = {
+        dim: table_schema[dim]["primary_key"][0]
+        for dim in dimensions
+        if len(table_schema.get(dim, {}).get("primary_key", [])) == 1
+    }
+
+    units: Dict[str, List[str]] = {}
+    for fact in facts:
+        header = parents[fact][0] if fact in parents and parents[fact][0] in facts else fact
+        units.setdefault(header, [header])
+        if fact != header:
+            units[header].append(fact)
+
+    groups: Dict[tuple, List[List[str]]] = {}
+    for unit in units.values():
+        columns = set().union(*(table_schema.get(t, {}).get("columns", {}) for t in unit))
+        referenced = tuple(sorted(dim for dim, key in dimension_keys.items() if key in columns))
+        groups.setdefault(referenced, []).append(unit)
+    return groups
+
+def _row_bytes(row) -> int:
+    """
+    Roughly estimate the bound size of a row, in bytes.
+    """
+    return sum(len(str(v)) for v in row if v is not None) + len(row)
+
+def _batched_rows(data_iter, max_rows: int, max_bytes: int):
+    """
+    Lazily split row tuples into lists capped by row count and by bytes.
+    """
+    batch, batch_bytes = [], 0
+    for row in data_iter:
+        row_bytes = _row_bytes(row)
+        if batch and (len(batch) >= max_rows or batch_bytes + row_bytes > max_bytes):
+            yield batch, batch_bytes
+            batch, batch_bytes = [], 0
+        batch.append(row)
+        batch_bytes += row_bytes
+    if batch:
+        yield batch, batch_bytes
+
+def _placeholder(paramstyle: str, position: int) -> str:
+    if paramstyle == "qmark":
+        return "?"
+    if paramstyle == "numeric":
+        return f":{position}"
+    return "%s"
+
+@lru_cache(maxsize=256)
+def _insert_template(schema_name: str, table_name: str, keys: tuple, n_rows: int, paramstyle: str) -> str:
+    """
+    Build (once per batch shape) the INSERT statement for `n_rows` rows.
+    """
+    column_names = ",".join(keys)
+    n_cols = len(keys)
+    rows = []
+    for r in range(n_rows):
+        row = ",".join(_placeholder(paramstyle, r * n_cols + c + 1) for c in range(n_cols))
+        rows.append(f"({row})")
+    return f"INSERT INTO {schema_name}.{table_name} ({column_names}) VALUES " + ",".join(rows)
+
+def insert_snowflake(
+    table,
+    conn,
+    keys,
+    data_iter,
+    max_rows: int = 16_384,
+    max_bytes: int = 8 * 1024 * 1024,
+    use_executemany: bool = True
+):
     """
     Custom insert method for Pandas `to_sql` with Snowflake.
 
-    This function is intended to be passed as the `method` argument 
-    to `DataFrame.to_sql`. It builds a bulk `INSERT INTO` statement 
-    for Snowflake using the provided table metadata, connection, 
-    and data rows.
+    This function is intended to be passed as the `method` argument
+    to `DataFrame.to_sql`. Rows are pulled lazily from `data_iter` and
+    split into batches capped by `max_rows` and by `max_bytes`, so neither
+    the statement nor the bound values grow with the size of the frame.
+
+    Each batch is sent with the DBAPI `executemany` on a single-row
+    statement, which the Snowflake connector turns into array binding or
+    a rewritten multi-row insert. With `use_executemany=False` a multi-row
+    `INSERT ... VALUES` statement is used instead; its text is cached per
+    batch shape, so full batches reuse the same precompiled template.
+    Throughput is logged for every batch.
+
+    Use `functools.partial` to change the batch limits, e.g.
+    `method=partial(insert_snowflake, max_rows=5_000)`.
 
     Args:
-        table (sqlalchemy.Table): The SQLAlchemy Table object representing 
-            the target table in Snowflake.
-        conn (sqlalchemy.engine.Connection): Active SQLAlchemy connection 
+        table (pandas.io.sql.SQLTable): Pandas table wrapper for the target
+            table in Snowflake.
+        conn (sqlalchemy.engine.Connection): Active SQLAlchemy connection
             to the Snowflake database.
         keys (list[str]): List of column names to be inserted.
-        data_iter (Iterable[tuple]): Iterable of row tuples containing the 
+        data_iter (Iterable[tuple]): Iterable of row tuples containing the
             values to insert.
+        max_rows (int, optional): Maximum rows per batch. Default is 16384.
+        max_bytes (int, optional): Approximate maximum bound bytes per batch.
+            Default is 8 MiB.
+        use_executemany (bool, optional): Send batches with `executemany`.
+            Default is True.
 
     Returns:
-        None
+        int: Number of rows inserted.
 
     Raises:
         SQLAlchemyError: If the insert statement fails to execute.
@@ -87,22 +277,254 @@ def insert_snowflake(table, conn, keys, data_iter):
     """
     table_name = table.name
     schema_name = table.schema
-    column_names = ",".join(keys)
-    insert_sql = f'INSERT INTO {schema_name}.{table_name} ({column_names}) VALUES '
+    keys = tuple(keys)
+    paramstyle = conn.dialect.paramstyle
+
+    total_rows = 0
+    for batch_no, (rows, batch_bytes) in enumerate(_batched_rows(data_iter, max_rows, max_bytes), start=1):
+        start = time.perf_counter()
+
+        if use_executemany:
+            statement = _insert_template(schema_name, table_name, keys, 1, paramstyle)
+            conn.exec_driver_sql(statement, [tuple(row) for row in rows])
+        else:
+            statement = _insert_template(schema_name, table_name, keys, len(rows), paramstyle)
+            conn.exec_driver_sql(statement, tuple(v for row in rows for v in row))
+
+        elapsed = time.perf_counter() - start
+        total_rows += len(rows)
+        logging.info(
+            f"[INSERT] Table={schema_name}.{table_name}, Batch={batch_no}, Rows={len(rows)}, "
+            f"Bytes={batch_bytes}, Seconds={elapsed:.2f}, Rows/s={len(rows) / max(elapsed, 1e-9):.0f}"
+        )
+
+    return total_rows
+
+class _Raised:
+    """Wraps an exception raised inside a producer thread."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+_DONE = object()
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """
+    Put an item on a bounded queue, giving up once `stop` is set.
+    """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def fan_in(
+    iterables: List[Iterable],
+    maxsize: int = 4,
+    name: str = "fan_in",
+    stats: Optional[Dict[str, float]] = None
+) -> Iterator:
+    """
+    Consume several iterables concurrently and yield their items as they arrive.
+
+    Each iterable is drained by its own thread into a bounded queue, so at
+    most `maxsize` items are buffered regardless of how fast the producers
+    are (backpressure). An exception in any producer is re-raised in the
+    consumer, and closing the returned iterator stops all producers.
+
+    With a single iterable this is a producer/consumer prefetch: item N+1
+    is produced while the consumer is still working on item N.
+
+    If `stats` is given it is filled with busy/wait seconds for both sides:
+    `producer_busy` (time spent producing items, summed over producers),
+    `producer_wait` (blocked on a full queue, i.e. the consumer is the
+    bottleneck), `consumer_busy` (time between receiving an item and asking
+    for the next one) and `consumer_wait` (blocked on an empty queue, i.e.
+    the producers are the bottleneck).
+
+    Args:
+        iterables (List[Iterable]): Iterables to consume, e.g. one streaming
+            extract per shard.
+        maxsize (int, optional): Maximum number of buffered items. Default is 4.
+        name (str, optional): Thread name prefix, useful in logs.
+        stats (dict, optional): Dict to fill with busy/wait timings.
+
+    Returns:
+        Iterator: Items from all iterables, in arrival order.
+
+    Example:
+        >>> for chunk in fan_in([extract_a, extract_b], maxsize=2):
+        ...     print(len(chunk))
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = stats if stats is not None else {}
+    for key in ("producer_busy", "producer_wait", "consumer_busy", "consumer_wait"):
+        stats.setdefault(key, 0.0)
+
+    def add(key: str, seconds: float):
+        with lock:
+            stats[key] += seconds
 
-    rows = list(data_iter)
-    if not rows:
-        return
+    def produce(iterable):
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    add("producer_busy", time.perf_counter() - start)
 
-    placeholders = ",".join(["(" + ",".join(["%s"] * len(keys)) + ")" for _ in rows])
+                start = time.perf_counter()
+                delivered = _put(q, item, stop)
+                add("producer_wait", time.perf_counter() - start)
+                if not delivered:
+                    break
+        except BaseException as e:
+            _put(q, _Raised(e), stop)
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+            _put(q, _DONE, stop)
 
-    values = []
-    for row in rows:
-        values.extend([v if v is not None else None for v in row])
+    threads = [
+        threading.Thread(target=produce, args=(it,), name=f"{name}_{i}", daemon=True)
+        for i, it in enumerate(iterables)
+    ]
+    for thread in threads:
+        thread.start()
 
-    conn.execute(insert_sql + placeholders, values)
+    remaining = len(threads)
+    try:
+        while remaining:
+            start = time.perf_counter()
+            item = q.get()
+            received = time.perf_counter()
+            add("consumer_wait", received - start)
 
-def make_dbt_task(task_id: str, command: list, project_path, profile_path):
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, _Raised):
+                raise item.error
+            else:
+                yield item
+                add("consumer_busy", time.perf_counter() - received)
+    finally:
+        stop.set()
+
+_config_cache: Dict[str, tuple] = {}
+_config_lock = threading.Lock()
+
+
+def get_config(name: str, ttl: float = 300) -> dict:
+    """
+    Read a JSON Airflow Variable through a small per-process TTL cache.
+
+    Call it inside tasks, never at DAG top level: the DAG file then parses
+    without a metadata-DB round-trip, and a worker process that runs many
+    tasks reads each Variable at most once per `ttl` seconds.
+
+    Args:
+        name (str): Variable key, e.g. `"sql_file"`.
+        ttl (float, optional): Seconds a value is reused. Defaults to 300.
+
+    Returns:
+        dict: Deserialized Variable value.
+
+    Raises:
+        KeyError: If the Variable does not exist.
+
+    Example:
+        >>> Path(get_config("sql_file")["fact_queries"])
+        PosixPath('/usr/local/airflow/include/sql/fact')
+    """
+    now = time.monotonic()
+    cached = _config_cache.get(name)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    with _config_lock:
+        cached = _config_cache.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        value = Variable.get(name, deserialize_json=True)
+        _config_cache[name] = (now + ttl, value)
+        return value
+
+class DbtDockerOperator(DockerOperator):
+    """
+    DockerOperator whose dbt project and profile bind mounts are templated.
+
+    `project_path` and `profile_path` are rendered at run time (e.g.
+    `"{{ var.json.dbt_path.project_path }}"`) and turned into mounts in
+    `execute`, so no Variable is read while the DAG is parsed.
+    """
+
+    template_fields = (*DockerOperator.template_fields, "project_path", "profile_path")
+
+    def __init__(self, *, project_path: str, profile_path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.project_path = project_path
+        self.profile_path = profile_path
+
+    def execute(self, context):
+        self.mounts = [
+            Mount(source=self.project_path, target="/usr/app/dbt", type="bind"),
+            Mount(source=self.profile_path, target="/root/.dbt", type="bind"),
+        ]
+        return super().execute(context)
+
+class DbtBuildOperator(DbtDockerOperator):
+    """
+    Run every dbt phase in one container with `dbt build` and report
+    per-phase timings.
+
+    After dbt exits, `scripts/phase_timings.py` summarises
+    `target/run_results.json` as one JSON line (the last log line, which
+    DockerOperator returns). Each phase (`test_source`, `run`, `test_model`,
+    `snapshot`) is pushed as its own XCom key with node count, failures and
+    seconds; the whole summary is the task's return value. When dbt fails,
+    the container exits non-zero and DockerOperator raises; the timings are
+    then read from the last line of the exception's logs and pushed before
+    the failure is re-raised.
+    """
+
+    def execute(self, context):
+        try:
+            output = super().execute(context)
+        except DockerContainerFailedException as e:
+            self._push_timings(context, e.logs[-1] if e.logs else None)
+            raise
+        return self._push_timings(context, output)
+
+    def _push_timings(self, context, output) -> Optional[dict]:
+        if isinstance(output, bytes):
+            output = output.decode()
+        output = output.strip() if output else output
+
+        try:
+            timings = json.loads(output) if output else {}
+        except ValueError:
+            logging.warning(f"[DBT] Output terakhir bukan JSON timing: {output!r}")
+            return None
+
+        for phase, stats in timings.items():
+            context["ti"].xcom_push(key=phase, value=stats)
+            logging.info(f"[DBT] Phase={phase}, Stats={stats}")
+        return timings
+
+def make_dbt_task(
+    task_id: str,
+    command: list,
+    project_path: str = "{{ var.json.dbt_path.project_path }}",
+    profile_path: str = "{{ var.json.dbt_path.profile_path }}"
+):
     """
     Create an Airflow task using DockerOperator to execute dbt commands.
 
@@ -116,6 +538,11 @@ def make_dbt_task(task_id: str, command: list, project_path, profile_path):
             Also used as the container name (prefixed with "dbt-").
         command (list): List of commands to be executed inside the dbt container.
             Example: ["run"], ["test", "--select", "model:dim_*"], etc.
+        project_path (str, optional): Host path of the dbt project. Templated;
+            defaults to the `project_path` key of the `dbt_path` Variable,
+            resolved when the task runs.
+        profile_path (str, optional): Host path of the dbt profile. Templated;
+            defaults to the `profile_path` key of the `dbt_path` Variable.
 
     Returns:
         DockerOperator: An Airflow operator that runs a dbt container
@@ -132,7 +559,7 @@ def make_dbt_task(task_id: str, command: list, project_path, profile_path):
         ... )
     """
 
-    return DockerOperator(
+    return DbtDockerOperator(
                         task_id=task_id,
                         image="ghcr.io/dbt-labs/dbt-snowflake:1.9.latest",
                         command=command,
@@ -144,18 +571,86 @@ def make_dbt_task(task_id: str, command: list, project_path, profile_path):
                         mount_tmp_dir=False,
                         tty=False,
                         xcom_all=False,
-                        mounts=[
-                            Mount(
-                                source=project_path,
-                                target="/usr/app/dbt", 
-                                type="bind"
-                                ),
-                                    
-                            Mount(
-                                source=profile_path, 
-                                target="/root/.dbt", 
-                                type="bind"
-                                )
-                            ],
+                        project_path=project_path,
+                        profile_path=profile_path,
                         environment={"RUN_DATE": "{{ ds }}"}
                         )
+
+def dbt_selection(tables: Iterable[str], source: str = "staging") -> List[str]:
+    """
+    Translate landing tables into dbt node selectors for their downstream graph.
+
+    Example:
+        >>> dbt_selection(["sales", "products"])
+        ['source:staging.products+', 'source:staging.sales+']
+    """
+    return [f"source:{source}.{table}+" for table in sorted(tables)]
+
+def make_dbt_build_task(
+    task_id: str,
+    select: Union[List[str], str, None] = None,
+    exclude: Optional[List[str]] = None,
+    environment: Optional[dict] = None,
+    project_path: str = "{{ var.json.dbt_path.project_path }}",
+    profile_path: str = "{{ var.json.dbt_path.profile_path }}"
+):
+    """
+    Create a single dbt task running `dbt build` instead of separate
+    test / run / test / snapshot containers.
+
+    One container means one project parse, one package resolution and one
+    Snowflake login (`reuse_connections` in `profiles.yml`). The
+    partial-parse state in the mounted `target/` is reused between runs
+    because nothing per run goes through `--vars` or `dbt_project.yml`
+    (either would force a full re-parse): per-run values such as the load
+    window are env vars read inside the macros, and when their values
+    change dbt re-parses only the nodes that read them. `dbt build`
+    still runs source tests before the models, model tests after them and
+    snapshots after their parents, and stops downstream nodes of a failure.
+    Per-phase timings are pushed to XCom (see `DbtBuildOperator`).
+
+    Args:
+        task_id (str): Unique ID for the task within the Airflow DAG.
+        select (List[str] or str, optional): dbt node selection, e.g.
+            `["source:staging.sales+"]` (see `dbt_selection`), or a templated
+            string such as an XCom pull. None builds the whole project.
+        exclude (List[str], optional): Nodes to exclude.
+        environment (dict, optional): Extra env vars of the container, on top
+            of `RUN_DATE`; templated, e.g. `{"WINDOW_END": "{{ ds }}"}`.
+        project_path (str, optional): Host path of the dbt project. Templated.
+        profile_path (str, optional): Host path of the dbt profile. Templated.
+
+    Returns:
+        DbtBuildOperator: An Airflow operator running `dbt build`.
+
+    Example:
+        >>> dbt_build = make_dbt_build_task(task_id="dbt_build")
+    """
+    build = ["dbt", "build"]
+    if isinstance(select, str):
+        build += ["--select", select]
+    elif select:
+        build += ["--select", *select]
+    if exclude:
+        build += ["--exclude", *exclude]
+
+    # exit code dbt dipertahankan; timing tetap dicetak (dan di-push DbtBuildOperator) walau build gagal
+    script = f"{' '.join(build)}; status=$?; python scripts/phase_timings.py target; exit $status"
+
+    return DbtBuildOperator(
+                        task_id=task_id,
+                        image="ghcr.io/dbt-labs/dbt-snowflake:1.9.latest",
+                        entrypoint=["/bin/sh", "-c"],
+                        command=[script],
+                        container_name=f"dbt-{task_id}",
+                        api_version="auto",
+                        auto_remove="success",
+                        docker_url="tcp://docker-proxy:2375",
+                        network_mode="airflow_fb4c73_dimsnet",
+                        mount_tmp_dir=False,
+                        tty=False,
+                        xcom_all=False,
+                        project_path=project_path,
+                        profile_path=profile_path,
+                        environment={"RUN_DATE": "{{ ds }}", **(environment or {})}
+                        )
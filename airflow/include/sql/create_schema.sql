@@ -89,3 +89,18 @@ CREATE TABLE IF NOT EXISTS sales (
     total_amount DECIMAL(10,2)
     -- FOREIGN KEY opsional
 );
+
+-- ================= ETL Checkpoint =================
+-- Dipakai elt_pipeline untuk melanjutkan retry per table / per chunk
+CREATE TABLE IF NOT EXISTS etl_checkpoint (
+    run_id VARCHAR(250),
+    table_name VARCHAR(100),
+    chunk_no INT,
+    row_count INT,
+    status VARCHAR(20),
+    last_key VARCHAR(100),
+    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- kolom last_key untuk tabel checkpoint yang dibuat sebelum resume per key
+ALTER TABLE etl_checkpoint ADD COLUMN IF NOT EXISTS last_key VARCHAR(100);
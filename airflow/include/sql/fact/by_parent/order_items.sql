@@ -0,0 +1,8 @@
+SELECT
+    oi.order_item_id,
+    oi.order_id,
+    oi.product_id,
+    oi.quantity,
+    oi.price
+FROM retail_supply_chain.order_items oi
+WHERE oi.order_id IN :parent_keys;
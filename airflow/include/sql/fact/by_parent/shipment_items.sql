@@ -0,0 +1,7 @@
+SELECT 
+    si.shipment_item_id, 
+    si.shipment_id, 
+    si.product_id, 
+    si.quantity 
+FROM retail_supply_chain.shipment_items si 
+WHERE si.shipment_id IN :parent_keys;
@@ -1,7 +1,7 @@
 WITH cte_order AS (
     SELECT order_id
     FROM retail_supply_chain.orders
-    WHERE order_date BETWEEN '{prev_ds}' AND '{ds}'
+    WHERE order_date >= '{window_start}' AND order_date < '{window_end}'
 )
 SELECT
     oi.order_item_id,
@@ -5,7 +5,7 @@ WITH cte_order AS (
         customer_name,
         customer_address
     FROM retail_supply_chain.orders o
-    WHERE order_date BETWEEN '{prev_ds}' AND '{ds}'
+    WHERE order_date >= '{window_start}' AND order_date < '{window_end}'
 )
 SELECT
     order_id,
@@ -5,4 +5,4 @@ SELECT
     s.quantity,
     s.total_amount
 FROM retail_supply_chain.sales s
-WHERE s.sale_date BETWEEN '{prev_ds}' AND '{ds}';
\ No newline at end of file
+WHERE s.sale_date >= '{window_start}' AND s.sale_date < '{window_end}';
\ No newline at end of file
@@ -2,7 +2,7 @@ WITH cte_shipment AS
 ( 
     SELECT shipment_id 
     FROM retail_supply_chain.shipments 
-    WHERE shipment_date BETWEEN '{prev_ds}' AND '{ds}'
+    WHERE shipment_date >= '{window_start}' AND shipment_date < '{window_end}'
 ) 
 SELECT 
     si.shipment_item_id, 
@@ -5,7 +5,7 @@ WITH cte_shipment AS (
         warehouse_id,
         shipment_date
     FROM retail_supply_chain.shipments
-    WHERE shipment_date BETWEEN '{prev_ds}' AND '{ds}'
+    WHERE shipment_date >= '{window_start}' AND shipment_date < '{window_end}'
 )
 SELECT
     shipment_id,
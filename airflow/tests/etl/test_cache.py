@@ -0,0 +1,138 @@
+"""Parquet landing cache: hit, miss, refresh, integrity and eviction."""
+
+import json
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl import pipeline
+from include.etl.cache import MANIFEST, ParquetCache, partition_key
+from include.etl.extract import extract_from_source
+
+
+def frames():
+    return [pd.DataFrame({"sale_id": [1, 2]}), pd.DataFrame({"sale_id": [3]})]
+
+
+def test_miss_then_hit(tmp_path):
+    cache = ParquetCache(tmp_path)
+    assert not cache.has("sales", "2025-09-25")
+
+    written = list(cache.write_through("sales", "2025-09-25", iter(frames())))
+    replayed = list(cache.read("sales", "2025-09-25"))
+
+    assert cache.manifest("sales", "2025-09-25")["rows"] == 3
+    assert [f["sale_id"].tolist() for f in replayed] == [f["sale_id"].tolist() for f in written]
+
+
+def test_interrupted_write_is_not_published(tmp_path):
+    cache = ParquetCache(tmp_path)
+    stream = cache.write_through("sales", "2025-09-25", iter(frames()))
+    next(stream)
+    stream.close()
+
+    assert not cache.has("sales", "2025-09-25")
+    assert not any(p.name.startswith(".") for p in (tmp_path / "sales").iterdir())
+
+
+def test_corrupted_partition_is_rejected(tmp_path):
+    cache = ParquetCache(tmp_path)
+    list(cache.write_through("sales", "2025-09-25", iter(frames())))
+    part = cache.path("sales", "2025-09-25") / "part-00000.parquet"
+    part.write_bytes(part.read_bytes() + b"x")
+
+    with pytest.raises(ValueError):
+        list(cache.read("sales", "2025-09-25"))
+
+
+def age(cache, table, partition, seconds):
+    manifest_path = cache.path(table, partition) / MANIFEST
+    manifest = json.loads(manifest_path.read_text())
+    manifest["created_at"] = time.time() - seconds
+    manifest_path.write_text(json.dumps(manifest))
+
+
+def test_evicts_partitions_older_than_max_age(tmp_path):
+    cache = ParquetCache(tmp_path, max_age_days=7)
+    for ds in ("2025-09-01", "2025-09-25"):
+        list(cache.write_through("sales", ds, iter(frames())))
+    age(cache, "sales", "2025-09-01", 8 * 86400)
+
+    removed = cache.evict()
+
+    assert removed == [cache.path("sales", "2025-09-01")]
+    assert cache.has("sales", "2025-09-25")
+
+
+def test_evicts_oldest_partitions_over_max_bytes(tmp_path):
+    cache = ParquetCache(tmp_path)
+    for i, ds in enumerate(("2025-09-23", "2025-09-24", "2025-09-25")):
+        list(cache.write_through("sales", ds, iter(frames())))
+        age(cache, "sales", ds, 100 - i)
+    size = sum(f.stat().st_size for f in cache.path("sales", "2025-09-25").iterdir())
+    cache.max_bytes = size
+
+    cache.evict()
+
+    assert [cache.has("sales", ds) for ds in ("2025-09-23", "2025-09-24", "2025-09-25")] == [False, False, True]
+
+
+def test_partition_key_changes_with_query_params_and_keys():
+    base = partition_key("2025-09-25", "SELECT * FROM sales WHERE d >= :window_start", {"window_start": "2025-09-24"})
+
+    assert base.startswith("2025-09-25__")
+    assert base == partition_key("2025-09-25", "SELECT * FROM sales WHERE d >= :window_start", {"window_start": "2025-09-24"})
+    assert base != partition_key("2025-09-25", "SELECT * FROM sales WHERE d > :window_start", {"window_start": "2025-09-24"})
+    assert base != partition_key("2025-09-25", "SELECT * FROM sales WHERE d >= :window_start", {"window_start": "2025-09-21"})
+    assert partition_key("x", "q", parent_keys=[2, 1]) == partition_key("x", "q", parent_keys=[1, 2])
+    assert partition_key("x", "q", parent_keys=[1]) != partition_key("x", "q", parent_keys=[1, 2])
+
+
+@pytest.fixture
+def source(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    with engine.begin() as conn:
+        conn.execute("CREATE TABLE sales (sale_id INTEGER, sale_date TEXT)")
+        conn.execute("INSERT INTO sales VALUES (1, '2025-09-24'), (2, '2025-09-25')")
+    return engine
+
+
+def extract(source, cache, query="SELECT * FROM sales", params=None, refresh=False):
+    return extract_from_source(
+        "sales", source, query=query, params=params, cache=cache, cache_partition="2025-09-25", cache_refresh=refresh
+    )
+
+
+def test_extract_replays_the_cache_until_refreshed(tmp_path, source):
+    cache = ParquetCache(tmp_path / "cache")
+    assert len(extract(source, cache)) == 2
+
+    with source.begin() as conn:
+        conn.execute("INSERT INTO sales VALUES (3, '2025-09-25')")
+
+    assert len(extract(source, cache)) == 2
+    assert len(extract(source, cache, refresh=True)) == 3
+    assert len(extract(source, cache)) == 3
+
+
+def test_extract_with_other_params_does_not_replay(tmp_path, source):
+    cache = ParquetCache(tmp_path / "cache")
+    query = "SELECT * FROM sales WHERE sale_date >= :window_start"
+
+    assert len(extract(source, cache, query, {"window_start": "2025-09-25"})) == 1
+    assert len(extract(source, cache, query, {"window_start": "2025-09-24"})) == 2
+
+
+def test_loads_never_evict(tmp_path, source, monkeypatch):
+    queries = tmp_path / "fact"
+    queries.mkdir()
+    (queries / "sales.sql").write_text("SELECT * FROM sales")
+    cache = ParquetCache(tmp_path / "cache", max_bytes=0)
+    monkeypatch.setattr(cache, "evict", lambda: pytest.fail("evict dipanggil dari task load"))
+    monkeypatch.setattr(pipeline, "load_to_snowflake", lambda df, table_name, **kwargs: len(df))
+
+    pipeline.elt_pipeline(queries, source, object(), ds="2025-09-25", type="fact", cache=cache)
+
+    assert [p.name for p in (tmp_path / "cache" / "sales").iterdir()][0].startswith("ds=2025-09-25")
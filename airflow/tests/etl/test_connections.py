@@ -0,0 +1,54 @@
+"""LazyEngine: deferred creation, sharing, copy and pickle."""
+
+import copy
+import pickle
+
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl import connections
+from include.etl.connections import LazyEngine, resolve_engine
+
+created = []
+
+
+def sqlite_engine(name):
+    created.append(name)
+    return create_engine("sqlite://")
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    created.clear()
+    monkeypatch.setattr(connections, "_engines", {})
+
+
+def test_engine_is_created_on_first_use_and_shared():
+    first, second = LazyEngine(sqlite_engine, "warehouse"), LazyEngine(sqlite_engine, "warehouse")
+    assert created == []
+
+    assert first.dialect.name == "sqlite"
+    assert resolve_engine(second) is first.resolve()
+    assert created == ["warehouse"]
+
+
+@pytest.mark.parametrize("clone", [
+    copy.copy,
+    copy.deepcopy,
+    lambda engine: pickle.loads(pickle.dumps(engine)),
+])
+def test_copy_and_pickle_do_not_resolve(clone):
+    engine = LazyEngine(sqlite_engine, "warehouse")
+
+    cloned = clone(engine)
+
+    assert created == []
+    assert cloned.key == engine.key
+    assert resolve_engine(cloned) is engine.resolve()
+
+
+def test_private_attributes_are_not_forwarded():
+    engine = LazyEngine(sqlite_engine, "warehouse")
+    with pytest.raises(AttributeError):
+        engine._run_ddl_visitor
+    assert created == []
@@ -0,0 +1,45 @@
+"""dbt build task: per-phase timings pushed to XCom, also when the build fails."""
+
+import json
+
+import pytest
+from airflow.providers.docker.exceptions import DockerContainerFailedException
+
+from include.etl.utils import DbtDockerOperator, make_dbt_build_task
+
+
+TIMINGS = {"run": {"nodes": 3, "failures": 0, "seconds": 4.2}, "test_model": {"nodes": 5, "failures": 1, "seconds": 1.1}}
+
+
+class TaskInstance:
+    def __init__(self):
+        self.pushed = {}
+
+    def xcom_push(self, key, value):
+        self.pushed[key] = value
+
+
+@pytest.fixture
+def context():
+    return {"ti": TaskInstance()}
+
+
+def test_timings_are_pushed_per_phase(context, monkeypatch):
+    monkeypatch.setattr(DbtDockerOperator, "execute", lambda self, context: json.dumps(TIMINGS).encode())
+
+    result = make_dbt_build_task(task_id="build").execute(context)
+
+    assert result == TIMINGS
+    assert context["ti"].pushed == TIMINGS
+
+
+def test_timings_are_pushed_before_a_failed_build_is_raised(context, monkeypatch):
+    def failed(self, context):
+        raise DockerContainerFailedException("Docker container failed", logs=["1 of 5 FAIL", json.dumps(TIMINGS) + "\n"])
+
+    monkeypatch.setattr(DbtDockerOperator, "execute", failed)
+
+    with pytest.raises(DockerContainerFailedException):
+        make_dbt_build_task(task_id="build").execute(context)
+
+    assert context["ti"].pushed == TIMINGS
@@ -0,0 +1,48 @@
+"""Fact load units grouped by the dimensions they reference."""
+
+import pytest
+
+from include.etl.utils import plan_fact_groups
+
+
+SCHEMA = """
+CREATE TABLE products (product_id INT PRIMARY KEY, category VARCHAR(50));
+CREATE TABLE warehouses (warehouse_id INT PRIMARY KEY, location VARCHAR(50));
+CREATE TABLE suppliers (supplier_id INT, name VARCHAR(50), PRIMARY KEY (supplier_id));
+CREATE TABLE orders (order_id INT PRIMARY KEY, order_date DATE);
+CREATE TABLE order_items (order_item_id INT PRIMARY KEY, order_id INT, product_id INT);
+CREATE TABLE stock (warehouse_id INT, product_id INT, quantity INT, PRIMARY KEY (warehouse_id, product_id));
+CREATE TABLE audit_log (log_id INT PRIMARY KEY);
+"""
+DIMENSIONS = ["products", "suppliers", "warehouses"]
+
+
+@pytest.fixture
+def schema(tmp_path):
+    path = tmp_path / "create_schema.sql"
+    path.write_text(SCHEMA)
+    return path
+
+
+def test_units_are_grouped_by_referenced_dimensions(schema):
+    groups = plan_fact_groups(
+        schema, ["audit_log", "order_items", "orders", "stock"], DIMENSIONS, {"order_items": ("orders", "order_id")}
+    )
+
+    assert groups == {
+        (): [["audit_log"]],
+        ("products",): [["orders", "order_items"]],
+        ("products", "warehouses"): [["stock"]],
+    }
+
+
+def test_line_table_without_its_header_is_its_own_unit(schema):
+    groups = plan_fact_groups(schema, ["order_items"], DIMENSIONS, {"order_items": ("orders", "order_id")})
+
+    assert groups == {("products",): [["order_items"]]}
+
+
+def test_the_header_always_leads_its_unit(schema):
+    groups = plan_fact_groups(schema, ["order_items", "orders"], DIMENSIONS, {"order_items": ("orders", "order_id")})
+
+    assert groups[("products",)] == [["orders", "order_items"]]
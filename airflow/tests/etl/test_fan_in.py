@@ -0,0 +1,63 @@
+"""Bounded fan-in of concurrent producers."""
+
+import threading
+import time
+
+import pytest
+
+from include.etl.utils import fan_in
+
+
+def test_yields_every_item_of_every_producer():
+    items = list(fan_in([range(0, 5), range(5, 10), []], maxsize=2))
+
+    assert sorted(items) == list(range(10))
+
+
+def test_single_producer_keeps_its_order():
+    assert list(fan_in([iter(range(20))], maxsize=1)) == list(range(20))
+
+
+def test_producer_error_is_raised_in_the_consumer():
+    def failing():
+        yield 1
+        raise ValueError("extract gagal")
+
+    with pytest.raises(ValueError, match="extract gagal"):
+        list(fan_in([failing(), range(3)], maxsize=2))
+
+
+def test_early_close_stops_and_closes_producers():
+    closed = threading.Event()
+    produced = []
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                produced.append(i)
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    stream = fan_in([endless()], maxsize=2)
+    assert next(stream) == 0
+    stream.close()
+
+    assert closed.wait(timeout=5)
+    # backpressure: the producer never ran far ahead of the consumer
+    assert len(produced) <= 4
+
+
+def test_stats_name_the_slow_side():
+    def slow():
+        for i in range(3):
+            time.sleep(0.05)
+            yield i
+
+    stats = {}
+    list(fan_in([slow()], maxsize=1, stats=stats))
+
+    assert stats["producer_busy"] >= 0.1
+    assert stats["consumer_wait"] > stats["producer_wait"]
@@ -0,0 +1,94 @@
+"""Frame fingerprint: streaming, order independence and the unchanged skip."""
+
+import warnings
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from include.etl import pipeline
+from include.etl.extract import fingerprint_frames
+
+
+def fingerprint(frames):
+    result = {}
+    passed = list(fingerprint_frames(frames, result))
+    return result["fingerprint"], passed
+
+
+SALES = pd.DataFrame({"sale_id": [1, 2, 3, 4], "store_id": ["a", "a", "b", "b"], "qty": [5, 1, 2, 7]})
+
+
+def test_frames_are_passed_through_unchanged():
+    frames = [SALES.iloc[:2], SALES.iloc[2:]]
+    _, passed = fingerprint(iter(frames))
+    assert [f["sale_id"].tolist() for f in passed] == [[1, 2], [3, 4]]
+
+
+def test_batch_row_and_store_order_do_not_matter():
+    whole, _ = fingerprint(SALES)
+    batched, _ = fingerprint(iter([SALES.iloc[:1], SALES.iloc[1:3], SALES.iloc[3:]]))
+    # toko b tiba lebih dulu dari toko a (fan_in), kolom dalam urutan lain
+    stores = [SALES[SALES.store_id == "b"], SALES[SALES.store_id == "a"]]
+    reordered, _ = fingerprint(iter(f[["qty", "store_id", "sale_id"]].iloc[::-1] for f in stores))
+    assert whole == batched == reordered
+
+
+@pytest.mark.parametrize("changed", [
+    SALES.assign(qty=[5, 1, 2, 8]),
+    SALES.iloc[:3],
+    SALES.rename(columns={"qty": "quantity"}),
+    pd.concat([SALES, SALES.iloc[:1]]),
+])
+def test_content_changes_change_the_fingerprint(changed):
+    assert fingerprint(changed)[0] != fingerprint(SALES)[0]
+
+
+@pytest.fixture
+def fact_pipeline(tmp_path, monkeypatch):
+    source = create_engine("sqlite://", poolclass=StaticPool)
+    SALES.to_sql("sales", source, index=False)
+    queries = tmp_path / "fact"
+    queries.mkdir()
+    (queries / "sales.sql").write_text("SELECT * FROM sales")
+
+    stored, loaded = {}, []
+
+    def load(df, **kwargs):
+        frames = [df] if isinstance(df, pd.DataFrame) else list(df)
+        loaded.append(pd.concat(frames, ignore_index=True))
+        return sum(len(f) for f in frames)
+
+    monkeypatch.setattr(pipeline, "get_fingerprint", stored.get)
+    monkeypatch.setattr(pipeline, "set_fingerprint", stored.__setitem__)
+    monkeypatch.setattr(pipeline, "load_to_snowflake", load)
+
+    def run():
+        return pipeline.elt_pipeline(
+            queries, source, source, type="fact", chunksize=1,
+            defaults=pipeline.TableConfig(skip_unchanged=True)
+        )["sales"]
+
+    return run, loaded
+
+
+def test_streamed_table_is_replayed_then_skipped_when_unchanged(fact_pipeline):
+    run, loaded = fact_pipeline
+
+    first = run()
+    second = run()
+
+    assert first["rows"] == 4
+    pd.testing.assert_frame_equal(loaded[0], SALES)
+    assert second["status"] == "skipped" and second["reason"] == "unchanged"
+    assert len(loaded) == 1
+
+
+def test_large_hashes_wrap_without_overflow_warnings():
+    frames = [pd.DataFrame({"sku": [f"sku-{i}-{j}" for j in range(50)]}) for i in range(20)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        batched, _ = fingerprint(iter(frames))
+    whole, _ = fingerprint(pd.concat(frames[::-1], ignore_index=True))
+    assert batched == whole
@@ -0,0 +1,68 @@
+"""Row/byte-bounded batching of insert_snowflake."""
+
+from functools import partial
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl.utils import _batched_rows, _insert_template, _row_bytes, insert_snowflake
+
+
+def test_batches_are_capped_by_row_count():
+    batches = list(_batched_rows(((i,) for i in range(10)), max_rows=4, max_bytes=1 << 20))
+
+    assert [len(rows) for rows, _ in batches] == [4, 4, 2]
+
+
+def test_batches_are_capped_by_bytes():
+    rows = [("x" * 100,)] * 5
+    row_bytes = _row_bytes(rows[0])
+
+    batches = list(_batched_rows(iter(rows), max_rows=100, max_bytes=2 * row_bytes))
+
+    assert [len(batch) for batch, _ in batches] == [2, 2, 1]
+    assert all(size <= 2 * row_bytes for _, size in batches)
+
+
+def test_row_larger_than_byte_limit_gets_its_own_batch():
+    rows = [("a",), ("b" * 1_000,), ("c",)]
+
+    batches = list(_batched_rows(iter(rows), max_rows=100, max_bytes=50))
+
+    assert [batch for batch, _ in batches] == [[("a",)], [("b" * 1_000,)], [("c",)]]
+
+
+def test_empty_input_yields_nothing():
+    assert list(_batched_rows(iter([]), max_rows=10, max_bytes=10)) == []
+
+
+def test_null_values_do_not_count_as_bytes():
+    assert _row_bytes((None, None)) == 2
+    assert _row_bytes(("abc", 12)) == 5 + 2
+
+
+def test_insert_template_is_built_per_batch_shape():
+    _insert_template.cache_clear()
+
+    first = _insert_template("LANDING", "sales", ("a", "b"), 2, "qmark")
+    again = _insert_template("LANDING", "sales", ("a", "b"), 2, "qmark")
+
+    assert first == "INSERT INTO LANDING.sales (a,b) VALUES (?,?),(?,?)"
+    assert again is first
+    assert _insert_template.cache_info().hits == 1
+    assert _insert_template("LANDING", "sales", ("a",), 2, "numeric") == "INSERT INTO LANDING.sales (a) VALUES (:1),(:2)"
+
+
+@pytest.mark.parametrize("use_executemany", [True, False])
+def test_insert_snowflake_loads_every_batch(use_executemany):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute("CREATE TABLE sales (sale_id INTEGER, note TEXT)")
+    df = pd.DataFrame({"sale_id": range(25), "note": ["n"] * 25})
+
+    method = partial(insert_snowflake, max_rows=10, use_executemany=use_executemany)
+    with engine.begin() as conn:
+        df.to_sql("sales", conn, schema="main", if_exists="append", index=False, method=method)
+
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM sales", engine)["n"].iloc[0] == 25
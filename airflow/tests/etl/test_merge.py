@@ -0,0 +1,178 @@
+"""MERGE statement generation and the statement order of merge and swap loads."""
+
+from contextlib import contextmanager
+
+import pandas as pd
+
+from include.etl import load
+from include.etl.load import _merge, _merge_sql, _swap, load_to_snowflake
+
+
+class RecordingConnection:
+    """Records executed SQL, with BEGIN/COMMIT/ROLLBACK markers for transactions."""
+
+    def __init__(self, log, count=0):
+        self.log = log
+        self.count = count
+
+    def execute(self, statement, *args, **kwargs):
+        self.log.append(" ".join(str(statement).split()))
+        count = self.count
+
+        class Result:
+            rowcount = 0
+
+            def scalar(self):
+                return count
+        return Result()
+
+    @contextmanager
+    def begin(self):
+        self.log.append("BEGIN")
+        try:
+            yield self
+        except Exception:
+            self.log.append("ROLLBACK")
+            raise
+        self.log.append("COMMIT")
+
+
+class RecordingEngine:
+    def __init__(self, count=0):
+        self.log = []
+        self.count = count
+
+    @contextmanager
+    def connect(self):
+        yield RecordingConnection(self.log, self.count)
+
+    @contextmanager
+    def begin(self):
+        conn = RecordingConnection(self.log, self.count)
+        with conn.begin():
+            yield conn
+
+
+def transactions(log):
+    """Statements grouped by transaction; statements outside one are their own group."""
+    groups, current = [], None
+    for line in log:
+        if line == "BEGIN":
+            current = []
+        elif line in ("COMMIT", "ROLLBACK"):
+            groups.append(current)
+            current = None
+        elif current is not None:
+            current.append(line)
+        else:
+            groups.append([line])
+    return groups
+
+
+def test_merge_sql_with_composite_key():
+    sql = _merge_sql("stock", "stock__merge", "LANDING", ["warehouse_id", "product_id"], ["warehouse_id", "product_id", "quantity"])
+
+    assert sql == (
+        "MERGE INTO LANDING.stock AS t USING "
+        "(SELECT * FROM LANDING.stock__merge "
+        "QUALIFY ROW_NUMBER() OVER (PARTITION BY warehouse_id, product_id ORDER BY _etl_seq DESC) = 1) AS s "
+        "ON t.warehouse_id = s.warehouse_id AND t.product_id = s.product_id "
+        "WHEN MATCHED THEN UPDATE SET quantity = s.quantity "
+        "WHEN NOT MATCHED THEN INSERT (warehouse_id, product_id, quantity) "
+        "VALUES (s.warehouse_id, s.product_id, s.quantity)"
+    )
+
+
+def test_merge_sql_with_only_key_columns_has_no_update():
+    sql = _merge_sql("links", "links__merge", "LANDING", ["a", "b"], ["a", "b"])
+
+    assert "WHEN MATCHED" not in sql
+    assert sql.endswith("WHEN NOT MATCHED THEN INSERT (a, b) VALUES (s.a, s.b)")
+
+
+def test_delete_and_merge_share_one_transaction_without_ddl():
+    engine = RecordingEngine()
+    seen = {"columns": ["sale_id", "sale_date"]}
+    write = lambda conn, target: 3
+
+    rows = _merge(
+        engine, write, "sales", "LANDING", ["sale_id"], seen,
+        delete_window=("sale_date", "2025-09-24", "2025-09-25"),
+        on_commit=lambda conn: conn.execute("INSERT INTO LANDING.etl_checkpoint VALUES (1)")
+    )
+
+    groups = transactions(engine.log)
+    assert rows == 3
+    assert groups[0] == ["CREATE OR REPLACE TEMPORARY TABLE LANDING.sales__merge LIKE LANDING.sales"]
+    assert groups[1] == ["ALTER TABLE LANDING.sales__merge ADD COLUMN _etl_seq NUMBER"]
+    delete, merge, checkpoint = groups[3]
+    assert delete.startswith("DELETE FROM LANDING.sales WHERE sale_date >= :start")
+    assert merge.startswith("MERGE INTO LANDING.sales")
+    assert checkpoint.startswith("INSERT INTO LANDING.etl_checkpoint")
+    assert groups[4] == ["DROP TABLE IF EXISTS LANDING.sales__merge"]
+    assert not any(line.startswith(("CREATE", "ALTER", "DROP")) for group in groups[2:4] for line in group)
+
+
+def test_failed_write_leaves_the_window_alone():
+    engine = RecordingEngine()
+
+    def write(conn, target):
+        raise RuntimeError("insert gagal")
+
+    try:
+        _merge(engine, write, "sales", "LANDING", ["sale_id"], {}, delete_window=("sale_date", "a", "b"))
+    except RuntimeError:
+        pass
+
+    assert not any(line.startswith("DELETE") for line in engine.log)
+    assert engine.log[-1] == "DROP TABLE IF EXISTS LANDING.sales__merge"
+
+
+def test_chunked_merge_deletes_the_window_only_with_the_first_chunk(monkeypatch):
+    monkeypatch.setattr(load, "_insert_frames", lambda conn, frames, *args: sum(len(f) for f in frames))
+    engine = RecordingEngine()
+    frames = iter([pd.DataFrame({"sale_id": [1]}), pd.DataFrame({"sale_id": [2]})])
+    marks = []
+
+    load_to_snowflake(
+        frames, engine, "sales", mode="merge", key_columns=["sale_id"],
+        delete_window=("sale_date", "a", "b"),
+        checkpoint=lambda conn, chunk_no, n_rows: marks.append(chunk_no),
+    )
+
+    merges = [group for group in transactions(engine.log) if any(line.startswith("MERGE") for line in group)]
+    assert len(merges) == 2
+    assert merges[0][0].startswith("DELETE")
+    assert not any(line.startswith("DELETE") for line in merges[1])
+    assert marks == [1, 2]
+
+
+def test_swap_staging_table_keeps_the_target_grants():
+    engine = RecordingEngine(count=2)
+
+    rows = _swap(engine, lambda conn, target: 2, "stock", "LANDING")
+
+    assert rows == 2
+    assert engine.log[1] == "CREATE OR REPLACE TABLE LANDING.stock__staging LIKE LANDING.stock COPY GRANTS"
+    assert "ALTER TABLE LANDING.stock SWAP WITH LANDING.stock__staging" in engine.log
+    assert engine.log[-2] == "DROP TABLE IF EXISTS LANDING.stock__staging"
+
+
+def test_merge_rows_are_numbered_in_load_order(monkeypatch):
+    written = []
+
+    def insert(conn, frames, *args):
+        written.extend(frames)
+        return sum(len(f) for f in written)
+
+    monkeypatch.setattr(load, "_insert_frames", insert)
+    engine = RecordingEngine()
+    frames = [pd.DataFrame({"sale_id": [7, 7], "qty": [1, 2]}), pd.DataFrame({"sale_id": [7], "qty": [3]})]
+
+    load_to_snowflake(iter(frames), engine, "sales", mode="merge", key_columns=["sale_id"])
+
+    assert [f["_etl_seq"].tolist() for f in written] == [[0, 1], [2]]
+    assert "_etl_seq" not in frames[0].columns
+    merge = next(line for line in engine.log if line.startswith("MERGE"))
+    assert "ORDER BY _etl_seq DESC" in merge
+    assert merge.endswith("WHEN MATCHED THEN UPDATE SET qty = s.qty WHEN NOT MATCHED THEN INSERT (sale_id, qty) VALUES (s.sale_id, s.qty)")
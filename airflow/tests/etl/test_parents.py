@@ -0,0 +1,150 @@
+"""Line tables read through the keys of their header table."""
+
+import contextlib
+
+import pandas as pd
+import pytest
+from airflow.exceptions import AirflowFailException
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from include.etl import extract, pipeline
+from include.etl.extract import extract_from_source
+from include.etl.pipeline import TableConfig, _parents_first
+
+
+ORDERS = pd.DataFrame({"order_id": [1, 2, 3], "order_date": ["2025-09-24"] * 3})
+ITEMS = pd.DataFrame({"order_item_id": [10, 11, 20, 30, 40], "order_id": [1, 1, 2, 3, 4]})
+
+
+@pytest.fixture
+def source():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    ORDERS.to_sql("orders", engine, index=False)
+    ITEMS.to_sql("order_items", engine, index=False)
+    return engine
+
+
+def test_keys_are_sorted_and_batched(source):
+    frames = extract_from_source(
+        "order_items", source, query="SELECT * FROM order_items WHERE order_id IN :parent_keys",
+        chunksize=100, parent_keys={3, 1, 2}, key_batch_size=2,
+    )
+    assert [f["order_item_id"].tolist() for f in frames] == [[10, 11, 20], [30]]
+
+
+def test_no_keys_runs_no_query(source, monkeypatch):
+    queries = []
+    monkeypatch.setattr(extract, "_stream_from_source", lambda *args, **kwargs: queries.append(args) or iter(()))
+    query = "SELECT * FROM order_items WHERE order_id IN :parent_keys"
+
+    assert list(extract_from_source("order_items", source, query=query, chunksize=100, parent_keys=set())) == []
+    assert extract_from_source("order_items", source, query=query, parent_keys=[]).empty
+    assert queries == []
+
+
+def test_headers_are_ordered_before_line_tables(tmp_path):
+    files = [tmp_path / f"{t}.sql" for t in ("order_items", "stock", "shipment_items", "orders", "shipments")]
+    parents = {"order_items": ("orders", "order_id"), "shipment_items": ("shipments", "shipment_id")}
+
+    ordered = [f.stem for f in _parents_first(files, parents)]
+
+    assert ordered[:2] == ["orders", "shipments"]
+    assert ordered[-2:] == ["order_items", "shipment_items"]
+
+
+@pytest.fixture
+def fact_dir(tmp_path):
+    queries = tmp_path / "fact"
+    (queries / "by_parent").mkdir(parents=True)
+    (queries / "orders.sql").write_text("SELECT * FROM orders WHERE order_date >= '{window_start}'")
+    (queries / "order_items.sql").write_text("SELECT * FROM order_items")
+    (queries / "by_parent" / "order_items.sql").write_text("SELECT * FROM order_items WHERE order_id IN :parent_keys")
+    return queries
+
+
+@pytest.fixture
+def spied(monkeypatch):
+    """Record the parent keys each extraction is given and the first column each load receives."""
+    extracted, loaded = {}, {}
+    real_extract = pipeline.extract_from_source
+
+    def extract_spy(table_name, *args, **kwargs):
+        if table_name in fail:
+            raise RuntimeError(f"extract {table_name} gagal")
+        extracted[table_name] = kwargs.get("parent_keys")
+        return real_extract(table_name, *args, **kwargs)
+
+    def load(df, table_name, **kwargs):
+        frames = [df] if isinstance(df, pd.DataFrame) else list(df)
+        loaded[table_name] = sorted(v for f in frames for v in f.iloc[:, 0].tolist())
+        return sum(len(f) for f in frames)
+
+    fail = set()
+    monkeypatch.setattr(pipeline, "extract_from_source", extract_spy)
+    monkeypatch.setattr(pipeline, "load_to_snowflake", load)
+    return extracted, loaded, fail
+
+
+class Warehouse:
+    """Stands in for the Snowflake engine; only checkpoint writes open it."""
+
+    def begin(self):
+        return contextlib.nullcontext()
+
+
+CONFIG = {"order_items": TableConfig(parent=("orders", "order_id"))}
+
+
+def run(queries, source, **kwargs):
+    return pipeline.elt_pipeline(
+        queries, source, Warehouse(), ds="2025-09-25", type="fact", chunksize=2, config=CONFIG, **kwargs
+    )
+
+
+def test_line_table_reads_the_header_keys(fact_dir, source, spied):
+    extracted, loaded, _ = spied
+
+    run(fact_dir, source)
+
+    assert extracted["order_items"] == {1, 2, 3}
+    assert loaded["order_items"] == [10, 11, 20, 30]
+
+
+def test_line_table_falls_back_when_the_header_failed(fact_dir, source, spied):
+    extracted, loaded, fail = spied
+    fail.add("orders")
+
+    with pytest.raises(AirflowFailException, match="orders"):
+        run(fact_dir, source, max_workers=2)
+
+    assert extracted["order_items"] is None
+    assert loaded["order_items"] == [10, 11, 20, 30, 40]
+
+
+def test_line_table_falls_back_when_the_header_was_skipped(fact_dir, source, spied, monkeypatch):
+    extracted, loaded, _ = spied
+    monkeypatch.setattr(pipeline, "load_checkpoints", lambda *args: {"orders": {"done": True, "rows": 3}})
+    monkeypatch.setattr(pipeline, "save_checkpoint", lambda *args, **kwargs: None)
+
+    outcomes = run(fact_dir, source, run_id="manual__1")
+
+    assert outcomes["orders"]["reason"] == "checkpoint"
+    assert extracted["order_items"] is None
+    assert loaded["order_items"] == [10, 11, 20, 30, 40]
+
+
+def test_retried_header_is_extracted_in_full(fact_dir, source, spied, monkeypatch):
+    extracted, loaded, _ = spied
+    half_done = {"orders": {"chunk": 1, "done": False, "rows": 2, "last_key": 2}}
+    monkeypatch.setattr(pipeline, "load_checkpoints", lambda *args: half_done)
+    monkeypatch.setattr(pipeline, "save_checkpoint", lambda *args, **kwargs: None)
+    config = {**CONFIG, "orders": TableConfig(mode="merge", key_columns=["order_id"])}
+
+    pipeline.elt_pipeline(
+        fact_dir, source, Warehouse(), ds="2025-09-25", type="fact", chunksize=2, config=config, run_id="manual__1"
+    )
+
+    assert loaded["orders"] == [1, 2, 3]
+    assert extracted["order_items"] == {1, 2, 3}
+    assert loaded["order_items"] == [10, 11, 20, 30]
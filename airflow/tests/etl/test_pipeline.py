@@ -0,0 +1,78 @@
+"""elt_pipeline option validation, concurrent settling and pure helpers."""
+
+import threading
+
+import pandas as pd
+import pytest
+from airflow.exceptions import AirflowFailException
+from sqlalchemy import create_engine
+
+from include.etl import pipeline
+from include.etl.pipeline import TableConfig, changed_tables, elt_pipeline
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id INT AUTOINCREMENT PRIMARY KEY,
+    name VARCHAR(100),
+    updated_at TIMESTAMP_NTZ
+);
+"""
+
+
+@pytest.fixture
+def dimension_dir(tmp_path):
+    queries = tmp_path / "dimension"
+    queries.mkdir()
+    (queries / "products.sql").write_text("")
+    schema_file = tmp_path / "create_schema.sql"
+    schema_file.write_text(SCHEMA)
+    return queries, schema_file
+
+
+def test_watermark_on_a_key_column_is_rejected(dimension_dir):
+    queries, schema_file = dimension_dir
+    engine = create_engine("sqlite://")
+
+    with pytest.raises(ValueError, match="products.product_id"):
+        elt_pipeline(
+            queries, engine, engine, schema_file=schema_file,
+            config={"products": TableConfig(watermark="product_id")}
+        )
+
+
+def test_checkpoint_skips_with_rows_count_as_changed():
+    outcomes = {
+        "sales": {"status": "success", "rows": 120},
+        "orders": {"status": "skipped", "rows": 40, "reason": "checkpoint"},
+        "order_items": {"status": "skipped", "rows": 0, "reason": "checkpoint"},
+        "products": {"status": "skipped", "rows": 0, "reason": "unchanged"},
+        "stock": {"status": "success", "rows": 0},
+        "stores": {"status": "failed", "error": "timeout"},
+    }
+    assert changed_tables(outcomes) == ["orders", "sales"]
+
+
+def test_concurrent_failure_waits_for_the_other_tables(tmp_path, monkeypatch):
+    queries = tmp_path / "fact"
+    queries.mkdir()
+    for table in ("good", "bad"):
+        (queries / f"{table}.sql").write_text(f"SELECT * FROM {table} WHERE d >= '{{window_start}}'")
+
+    failed, loaded = threading.Event(), []
+
+    def load(df, table_name, **kwargs):
+        if table_name == "bad":
+            failed.set()
+            raise RuntimeError("COPY gagal")
+        assert failed.wait(5), "tabel lain tidak jalan bersamaan"
+        loaded.append(table_name)
+        return len(df)
+
+    monkeypatch.setattr(pipeline, "extract_from_source", lambda *args, **kwargs: pd.DataFrame({"id": [1, 2]}))
+    monkeypatch.setattr(pipeline, "load_to_snowflake", load)
+
+    with pytest.raises(AirflowFailException, match="Table gagal: bad$"):
+        elt_pipeline(queries, object(), object(), ds="2025-09-25", type="fact", max_workers=2)
+
+    assert loaded == ["good"]
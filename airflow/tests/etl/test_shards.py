@@ -0,0 +1,109 @@
+"""Key-range splitting and sharded extraction."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl.extract import _shard_ranges, extract_from_source
+
+
+def make_engine(tmp_path, keys):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    with engine.begin() as conn:
+        conn.execute("CREATE TABLE order_items (order_item_id INTEGER, quantity INTEGER)")
+        for key in keys:
+            conn.execute("INSERT INTO order_items VALUES (?, ?)", (key, 1))
+    return engine
+
+
+def rows_in(ranges, keys):
+    """Number of slices each key falls into."""
+    return [
+        sum(1 for lo, hi in ranges if key >= lo and (hi is None or key < hi))
+        for key in keys
+    ]
+
+
+def test_empty_table_has_no_ranges(tmp_path):
+    engine = make_engine(tmp_path, [])
+
+    assert _shard_ranges(engine, "SELECT * FROM order_items", "order_item_id", 4, {}) == []
+
+
+def test_single_key_gives_one_open_ended_range(tmp_path):
+    engine = make_engine(tmp_path, [7, 7])
+
+    assert _shard_ranges(engine, "SELECT * FROM order_items", "order_item_id", 4, {}) == [(7, None)]
+
+
+def test_fewer_keys_than_shards(tmp_path):
+    engine = make_engine(tmp_path, [1, 2])
+
+    ranges = _shard_ranges(engine, "SELECT * FROM order_items", "order_item_id", 8, {})
+
+    assert ranges == [(1, 2), (2, None)]
+
+
+def test_ranges_cover_every_key_exactly_once(tmp_path):
+    keys = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    engine = make_engine(tmp_path, keys)
+
+    ranges = _shard_ranges(engine, "SELECT * FROM order_items", "order_item_id", 3, {})
+
+    assert len(ranges) == 3
+    assert ranges[-1][1] is None
+    assert rows_in(ranges, keys) == [1] * len(keys)
+
+
+def test_skewed_keys_are_split_by_value_not_by_count(tmp_path):
+    keys = list(range(1, 11)) + [1_000_000]
+    engine = make_engine(tmp_path, keys)
+
+    ranges = _shard_ranges(engine, "SELECT * FROM order_items", "order_item_id", 4, {})
+
+    assert len(ranges) == 4
+    assert rows_in(ranges, keys) == [1] * len(keys)
+    # equal-width slices: the dense low keys all land in the first slice
+    assert all(key < ranges[0][1] for key in keys[:-1])
+
+
+def test_ranges_respect_query_params(tmp_path):
+    engine = make_engine(tmp_path, range(1, 101))
+
+    ranges = _shard_ranges(
+        engine, "SELECT * FROM order_items WHERE order_item_id <= :upper", "order_item_id", 2, {"upper": 10}
+    )
+
+    assert ranges == [(1, 6), (6, None)]
+
+
+@pytest.mark.parametrize("chunksize", [None, 3])
+def test_sharded_extract_returns_every_row_once(tmp_path, chunksize):
+    keys = list(range(1, 21)) + [500, 501]
+    engine = make_engine(tmp_path, keys)
+
+    result = extract_from_source(
+        "order_items", engine, query="SELECT * FROM order_items", chunksize=chunksize,
+        shards=3, shard_key="order_item_id"
+    )
+    df = result if chunksize is None else pd.concat(list(result), ignore_index=True)
+
+    assert sorted(df["order_item_id"].tolist()) == keys
+
+
+def test_sharded_extract_of_empty_result_keeps_columns(tmp_path):
+    engine = make_engine(tmp_path, [])
+
+    df = extract_from_source(
+        "order_items", engine, query="SELECT * FROM order_items", shards=3, shard_key="order_item_id"
+    )
+
+    assert df.empty
+    assert list(df.columns) == ["order_item_id", "quantity"]
+
+
+def test_sharding_requires_a_key(tmp_path):
+    engine = make_engine(tmp_path, [1])
+
+    with pytest.raises(ValueError):
+        extract_from_source("order_items", engine, shards=2)
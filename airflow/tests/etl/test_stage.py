@@ -0,0 +1,81 @@
+"""Stage-and-COPY path against a filesystem stage, loaded into SQLite."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl.stage import (
+    copy_into,
+    is_local_stage,
+    new_stage_prefix,
+    put_to_stage,
+    table_stage,
+    write_parquet_files,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute("CREATE TABLE products (product_id INTEGER, name TEXT, price REAL)")
+    return engine
+
+
+def test_stage_references():
+    assert table_stage("products", "LANDING") == "@LANDING.%products"
+    assert not is_local_stage("@LANDING.ETL_STAGE")
+    assert is_local_stage("file:///tmp/stage")
+    assert is_local_stage("/tmp/stage")
+
+
+def test_write_parquet_files_skips_empty_batches(tmp_path):
+    frames = [
+        pd.DataFrame({"product_id": [1, 2]}),
+        pd.DataFrame({"product_id": []}),
+        pd.DataFrame({"product_id": [3]}),
+    ]
+
+    files, rows = write_parquet_files(iter(frames), tmp_path / "out", "products")
+
+    assert rows == 3
+    assert [f.name for f in files] == ["products_00000.parquet", "products_00002.parquet"]
+
+
+def test_put_and_copy_through_filesystem_stage(tmp_path, engine):
+    frames = [
+        pd.DataFrame({"product_id": [1, 2], "name": ["a", "b"], "price": [1.5, 2.5]}),
+        pd.DataFrame({"product_id": [3], "name": ["c"], "price": [3.5]}),
+    ]
+    files, rows = write_parquet_files(frames, tmp_path / "parquet", "products")
+    stage = f"file://{tmp_path / 'stage'}"
+    prefix = new_stage_prefix("products")
+
+    put_to_stage(None, files, stage, prefix)
+    assert sorted(p.name for p in (tmp_path / "stage" / prefix).iterdir()) == [f.name for f in files]
+
+    with engine.begin() as conn:
+        copy_into(conn, "products", "main", stage, prefix)
+
+    loaded = pd.read_sql("SELECT * FROM products ORDER BY product_id", engine)
+    assert rows == 3
+    assert loaded["product_id"].tolist() == [1, 2, 3]
+    assert loaded["name"].tolist() == ["a", "b", "c"]
+    # COPY ... PURGE: the staged files are gone after the load
+    assert not (tmp_path / "stage" / prefix).exists()
+
+
+def test_copy_rolls_back_with_the_transaction(tmp_path, engine):
+    files, _ = write_parquet_files(
+        [pd.DataFrame({"product_id": [1], "name": ["a"], "price": [1.0]})], tmp_path / "parquet", "products"
+    )
+    stage = tmp_path / "stage"
+    prefix = new_stage_prefix("products")
+    put_to_stage(None, files, stage, prefix)
+
+    with pytest.raises(RuntimeError):
+        with engine.begin() as conn:
+            copy_into(conn, "products", "main", stage, prefix)
+            raise RuntimeError("gagal setelah COPY")
+
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM products", engine)["n"].iloc[0] == 0
@@ -0,0 +1,125 @@
+"""Several source stores loaded into one landing table."""
+
+import contextlib
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from include.etl import pipeline
+from include.etl.pipeline import TableConfig
+
+
+SCHEMA = """
+CREATE TABLE sales (store_id VARCHAR(10), sale_id INT, updated_at VARCHAR(20), PRIMARY KEY (sale_id));
+CREATE TABLE orders (store_id VARCHAR(10), order_id INT, PRIMARY KEY (order_id));
+CREATE TABLE order_items (store_id VARCHAR(10), order_item_id INT, order_id INT, PRIMARY KEY (order_item_id));
+"""
+
+STORES = {
+    "a": {
+        "sales": pd.DataFrame({"sale_id": [1, 2, 3], "updated_at": ["2025-09-23", "2025-09-24", "2025-09-25"]}),
+        "orders": pd.DataFrame({"order_id": [1, 2]}),
+        "order_items": pd.DataFrame({"order_item_id": [10, 20, 30], "order_id": [1, 2, 3]}),
+    },
+    "b": {
+        "sales": pd.DataFrame({"sale_id": [1, 4], "updated_at": ["2025-09-22", "2025-09-23"]}),
+        "orders": pd.DataFrame({"order_id": [1, 3]}),
+        "order_items": pd.DataFrame({"order_item_id": [11, 31, 21], "order_id": [1, 3, 2]}),
+    },
+}
+
+
+class Warehouse:
+    """Stands in for the Snowflake engine."""
+
+    def begin(self):
+        return contextlib.nullcontext()
+
+
+@pytest.fixture
+def stores():
+    engines = {}
+    for store, tables in STORES.items():
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        for table_name, frame in tables.items():
+            frame.to_sql(table_name, engine, index=False)
+        engines[store] = engine
+    return engines
+
+
+@pytest.fixture
+def fact_dir(tmp_path):
+    queries = tmp_path / "fact"
+    (queries / "by_parent").mkdir(parents=True)
+    for table_name in ("sales", "orders", "order_items"):
+        (queries / f"{table_name}.sql").write_text(f"SELECT * FROM {table_name}")
+    (queries / "by_parent" / "order_items.sql").write_text("SELECT * FROM order_items WHERE order_id IN :parent_keys")
+    (tmp_path / "create_schema.sql").write_text(SCHEMA)
+    return queries
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loaded, marks = {}, {"sales__a": "2025-09-23"}
+
+    def load(df, table_name, key_columns=None, **kwargs):
+        frames = [df] if isinstance(df, pd.DataFrame) else list(df)
+        loaded[table_name] = (pd.concat(frames, ignore_index=True), key_columns)
+        return sum(len(f) for f in frames)
+
+    monkeypatch.setattr(pipeline, "load_to_snowflake", load)
+    monkeypatch.setattr(pipeline, "get_watermark", lambda state, column: marks.get(state))
+    monkeypatch.setattr(pipeline, "set_watermark", lambda state, column, value: marks.__setitem__(state, value))
+    return loaded, marks
+
+
+def run(fact_dir, stores, **kwargs):
+    return pipeline.elt_pipeline(
+        fact_dir, stores, Warehouse(), ds="2025-09-25", type="fact", chunksize=2,
+        schema_file=fact_dir.parent / "create_schema.sql", **kwargs
+    )
+
+
+def rows(frame, *columns):
+    return sorted(frame[list(columns)].itertuples(index=False, name=None))
+
+
+def test_rows_are_tagged_and_watermarked_per_store(fact_dir, stores, loads):
+    loaded, marks = loads
+
+    run(fact_dir, stores, tables=["sales"], config={"sales": TableConfig(mode="merge", watermark="updated_at")})
+
+    frame, keys = loaded["sales"]
+    assert keys == ["store_id", "sale_id"]
+    # store a lanjut dari watermark-nya sendiri, store b belum punya watermark
+    assert rows(frame, "store_id", "sale_id") == [("a", 2), ("a", 3), ("b", 1), ("b", 4)]
+    assert marks == {"sales__a": "2025-09-25", "sales__b": "2025-09-23"}
+
+
+def test_line_tables_read_the_keys_of_their_own_store(fact_dir, stores, loads, monkeypatch):
+    loaded, _ = loads
+    extracted = {}
+    real_extract = pipeline.extract_from_source
+
+    def extract_spy(label, *args, **kwargs):
+        extracted[label] = kwargs.get("parent_keys")
+        return real_extract(label, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "extract_from_source", extract_spy)
+
+    run(fact_dir, stores, tables=["orders", "order_items"], config={"order_items": TableConfig(parent=("orders", "order_id"))})
+
+    assert extracted["order_items__a"] == {1, 2}
+    assert extracted["order_items__b"] == {1, 3}
+    assert rows(loaded["order_items"][0], "store_id", "order_item_id") == [("a", 10), ("a", 20), ("b", 11), ("b", 31)]
+
+
+def test_stores_need_a_store_column_in_the_landing_schema(fact_dir, stores, loads):
+    (fact_dir.parent / "create_schema.sql").write_text(SCHEMA.replace("store_id VARCHAR(10), sale_id", "sale_id"))
+
+    with pytest.raises(ValueError, match=r"store_id.*\['sales'\]"):
+        run(fact_dir, stores, tables=["sales", "orders"])
+
+    assert loads[0] == {}
@@ -0,0 +1,56 @@
+"""SQL templates: placeholder compilation and the mtime-keyed registry."""
+
+import os
+
+import pytest
+
+from include.etl.templates import compile_sql, load_template
+
+
+@pytest.mark.parametrize("raw, sql, params", [
+    ("SELECT * FROM sales WHERE sale_date = '{ds}'", "SELECT * FROM sales WHERE sale_date = :ds", ("ds",)),
+    ("SELECT * FROM sales WHERE sale_id > {watermark}", "SELECT * FROM sales WHERE sale_id > :watermark", ("watermark",)),
+    ("SELECT * FROM sales;\n", "SELECT * FROM sales", ()),
+    (
+        "SELECT * FROM sales WHERE sale_date >= '{window_start}' AND sale_date < '{window_end}' "
+        "AND '{window_start}' <= '{window_end}';",
+        "SELECT * FROM sales WHERE sale_date >= :window_start AND sale_date < :window_end "
+        "AND :window_start <= :window_end",
+        ("window_start", "window_end"),
+    ),
+])
+def test_compile_sql(raw, sql, params):
+    assert compile_sql(raw) == (sql, params)
+
+
+def test_bind_requires_every_parameter(tmp_path):
+    path = tmp_path / "sales.sql"
+    path.write_text("SELECT * FROM sales WHERE sale_date BETWEEN '{prev_ds}' AND '{ds}'")
+    template = load_template(path)
+
+    assert template.bind(prev_ds="2025-09-24", ds="2025-09-25", window_start=None) == {
+        "prev_ds": "2025-09-24", "ds": "2025-09-25"
+    }
+    with pytest.raises(ValueError, match="prev_ds"):
+        template.bind(ds="2025-09-25")
+
+
+def test_empty_file_has_no_query(tmp_path):
+    path = tmp_path / "products.sql"
+    path.write_text("")
+    assert load_template(path).sql is None
+
+
+def test_registry_recompiles_when_the_file_changes(tmp_path):
+    path = tmp_path / "sales.sql"
+    path.write_text("SELECT * FROM sales WHERE sale_date = '{ds}'")
+    first = load_template(path)
+    assert load_template(path) is first
+
+    path.write_text("SELECT * FROM sales WHERE sale_date >= '{window_start}'")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, first.mtime_ns + 1_000_000))
+
+    second = load_template(path)
+    assert second is not first
+    assert second.params == ("window_start",)
@@ -0,0 +1,103 @@
+"""Typed extraction: schema-driven Arrow dtypes decoded at read time, categorical VARCHARs."""
+
+import datetime
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl.extract import extract_from_source
+from include.etl.transform import encode_categories, read_dtypes
+
+
+COLUMN_TYPES = {
+    "sale_id": "INT",
+    "sale_date": "DATE",
+    "quantity": "SMALLINT",
+    "total_amount": "DECIMAL(10,2)",
+    "note": "VARCHAR(100)",
+}
+
+
+def test_read_dtypes_maps_schema_types():
+    dtypes = read_dtypes(COLUMN_TYPES)
+
+    assert dtypes == {
+        "sale_id": pd.ArrowDtype(pa.int32()),
+        "sale_date": pd.ArrowDtype(pa.date32()),
+        "quantity": pd.ArrowDtype(pa.int16()),
+        "total_amount": pd.ArrowDtype(pa.decimal128(10, 2)),
+    }
+
+
+def test_read_dtypes_overrides_win():
+    assert read_dtypes(COLUMN_TYPES, {"sale_id": "int64"})["sale_id"] == "int64"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    with engine.begin() as conn:
+        conn.execute("CREATE TABLE sales (sale_id INTEGER, sale_date TEXT, quantity INTEGER, total_amount TEXT, note TEXT)")
+        conn.execute("INSERT INTO sales VALUES (1, '2025-09-24', 2, '10.50', 'a'), (2, '2025-09-25', NULL, '3.25', 'b')")
+    return engine
+
+
+@pytest.mark.parametrize("chunksize", [None, 1])
+def test_extract_decodes_into_arrow_dtypes(engine, chunksize):
+    dtypes = read_dtypes(COLUMN_TYPES)
+    dtypes["total_amount"] = pd.ArrowDtype(pa.string())   # SQLite returns the decimal as text
+
+    result = extract_from_source("sales", engine, chunksize=chunksize, dtype=dtypes)
+    df = result if chunksize is None else pd.concat(list(result), ignore_index=True)
+
+    assert df["sale_id"].dtype == pd.ArrowDtype(pa.int32())
+    assert df["sale_date"].dtype == pd.ArrowDtype(pa.date32())
+    assert df["sale_date"].tolist() == [datetime.date(2025, 9, 24), datetime.date(2025, 9, 25)]
+    assert df["quantity"].dtype == pd.ArrowDtype(pa.int16())
+    assert df["quantity"].isna().tolist() == [False, True]
+    assert df["note"].dtype == pd.ArrowDtype(pa.string())
+
+
+def test_decimal_values_stay_exact(engine):
+    df = pd.DataFrame({"total_amount": [Decimal("10.50"), Decimal("3.25")]}).astype(
+        {"total_amount": read_dtypes(COLUMN_TYPES)["total_amount"]}
+    )
+
+    assert df["total_amount"].tolist() == [Decimal("10.50"), Decimal("3.25")]
+
+
+def test_dtypes_for_missing_columns_are_ignored(engine):
+    df = extract_from_source(
+        "sales", engine, query="SELECT sale_id FROM sales", dtype=read_dtypes(COLUMN_TYPES)
+    )
+
+    assert list(df.columns) == ["sale_id"]
+    assert df["sale_id"].dtype == pd.ArrowDtype(pa.int32())
+
+
+def test_low_cardinality_varchar_becomes_category():
+    df = pd.DataFrame({"product_id": [1, 2, 3, 4], "category": ["a", "a", "b", "a"], "name": ["w", "x", "y", "z"]})
+
+    encoded = encode_categories(df, {"product_id": "INT", "category": "VARCHAR(50)", "name": "VARCHAR(100)"})
+
+    assert encoded["category"].dtype == "category"
+    assert encoded["name"].dtype == object
+    assert encoded["product_id"].dtype == df["product_id"].dtype
+
+
+def test_typed_batches_bind_plain_values_on_insert(engine):
+    dtypes = read_dtypes(COLUMN_TYPES)
+    dtypes["total_amount"] = pd.ArrowDtype(pa.string())
+    df = encode_categories(extract_from_source("sales", engine, dtype=dtypes), {"note": "VARCHAR(100)"}, 1.0)
+    rows = []
+
+    df.to_sql("typed", engine, index=False, method=lambda table, conn, keys, data: rows.extend(data))
+
+    assert df["note"].dtype == "category"
+    assert rows == [
+        (1, datetime.date(2025, 9, 24), 2, "10.50", "a"),
+        (2, datetime.date(2025, 9, 25), None, "3.25", "b"),
+    ]
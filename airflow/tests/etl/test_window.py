@@ -0,0 +1,75 @@
+"""Fact extraction window: half-open bounds, prev_ds fallback, lookback and merge deletes."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from include.etl import pipeline
+from include.etl.load import _delete_window
+from include.etl.pipeline import TableConfig, _window
+
+
+def test_window_is_half_open_from_prev_ds_to_ds():
+    assert _window("2025-09-22", "2025-09-25") == ("2025-09-22", "2025-09-25")
+
+
+def test_window_falls_back_to_the_day_before_ds():
+    assert _window(None, "2025-09-25") == ("2025-09-24", "2025-09-25")
+    assert _window("", "2025-03-01") == ("2025-02-28", "2025-03-01")
+
+
+def test_lookback_days_widen_the_start_only():
+    assert _window("2025-09-24", "2025-09-25", lookback_days=3) == ("2025-09-21", "2025-09-25")
+    assert _window(None, "2025-09-25", lookback_days=2) == ("2025-09-22", "2025-09-25")
+
+
+def test_no_ds_means_no_window():
+    assert _window("2025-09-24", None) is None
+
+
+@pytest.fixture
+def captured(tmp_path, monkeypatch):
+    queries = tmp_path / "fact"
+    queries.mkdir()
+    for table_name in ("sales", "orders"):
+        (queries / f"{table_name}.sql").write_text(
+            f"SELECT * FROM {table_name} WHERE day >= '{{window_start}}' AND day < '{{window_end}}'"
+        )
+
+    calls = {}
+    monkeypatch.setattr(
+        pipeline, "extract_from_source",
+        lambda table_name, engine, query=None, params=None, **kwargs: calls.setdefault(table_name, {}).update(params=params)
+        or pd.DataFrame({"day": []}),
+    )
+    monkeypatch.setattr(
+        pipeline, "load_to_snowflake",
+        lambda df, table_name, delete_window=None, **kwargs: calls[table_name].update(delete_window=delete_window) or 0,
+    )
+    config = {
+        "sales": TableConfig(mode="merge", key_columns=["sale_id"], window_column="sale_date", lookback_days=2),
+        "orders": TableConfig(mode="merge", key_columns=["order_id"], window_column="order_date"),
+    }
+    pipeline.elt_pipeline(queries, object(), object(), prev_ds="2025-09-24", ds="2025-09-25", type="fact", config=config)
+    return calls
+
+
+def test_lookback_days_apply_per_table(captured):
+    assert captured["sales"]["params"] == {"window_start": "2025-09-22", "window_end": "2025-09-25"}
+    assert captured["orders"]["params"] == {"window_start": "2025-09-24", "window_end": "2025-09-25"}
+
+
+def test_merge_deletes_the_widened_window(captured):
+    assert captured["sales"]["delete_window"] == ("sale_date", "2025-09-22", "2025-09-25")
+    assert captured["orders"]["delete_window"] == ("order_date", "2025-09-24", "2025-09-25")
+
+
+def test_delete_window_keeps_rows_outside_the_half_open_window():
+    engine = create_engine("sqlite://")
+    days = ["2025-09-21", "2025-09-22", "2025-09-24", "2025-09-25"]
+    pd.DataFrame({"sale_date": days}).to_sql("sales", engine, index=False)
+
+    with engine.begin() as conn:
+        _delete_window(conn, "sales", "main", "sale_date", "2025-09-22", "2025-09-25")
+
+    assert pd.read_sql("SELECT sale_date FROM sales", engine)["sale_date"].tolist() == ["2025-09-21", "2025-09-25"]
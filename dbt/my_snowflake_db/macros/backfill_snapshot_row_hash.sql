@@ -0,0 +1,42 @@
+{% macro backfill_snapshot_row_hash(dry_run=false) -%}
+    {#-
+        One-off migration for the dimension snapshots created before row_hash existed:
+            dbt run-operation backfill_snapshot_row_hash [--args '{dry_run: true}']
+        Run it once, after deploying the row_hash models and before the next `dbt snapshot`
+        (or `dbt build`). It adds the row_hash column to each snapshot table that lacks it and
+        fills every row whose row_hash is NULL with the same expression as the dimension model
+        (row_hash + row_hash_columns). Without it, the first snapshot after the deploy sees
+        NULL -> hash on every current row, closes them all and re-inserts them once.
+        Idempotent: rows that already have a row_hash are left alone.
+    -#}
+    {%- set snapshots = {
+        "dim_product_snapshot": "dim_products",
+        "dim_supplier_snapshot": "dim_suppliers",
+        "dim_warehouse_snapshot": "dim_warehouses"
+    } -%}
+
+    {%- for snapshot_name, model_name in snapshots.items() -%}
+        {%- set snapshot = ref(snapshot_name) -%}
+        {%- set relation = adapter.get_relation(snapshot.database, snapshot.schema, snapshot.identifier) -%}
+        {%- if relation is none -%}
+            {{ log("[BACKFILL] Snapshot=" ~ snapshot_name ~ " belum ada, dilewati", info=true) }}
+        {%- else -%}
+            {%- set columns = adapter.get_columns_in_relation(relation) | map(attribute="name") | map("lower") | list -%}
+            {%- set queries = [] -%}
+            {%- if "row_hash" not in columns -%}
+                {%- do queries.append("ALTER TABLE " ~ relation ~ " ADD COLUMN row_hash VARCHAR") -%}
+            {%- endif -%}
+            {%- do queries.append(
+                "UPDATE " ~ relation ~ " SET row_hash = " ~ row_hash(row_hash_columns(model_name)) ~ " WHERE row_hash IS NULL"
+            ) -%}
+
+            {%- for sql in queries -%}
+                {{ log("[BACKFILL] Snapshot=" ~ snapshot_name ~ ", SQL=" ~ (sql | replace("\n", " ")), info=true) }}
+                {%- if not dry_run -%}
+                    {%- call statement("backfill_row_hash", auto_begin=true) -%}{{ sql }}{%- endcall -%}
+                    {%- do adapter.commit() -%}
+                {%- endif -%}
+            {%- endfor -%}
+        {%- endif -%}
+    {%- endfor -%}
+{%- endmacro %}
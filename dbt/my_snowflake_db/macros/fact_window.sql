@@ -0,0 +1,54 @@
+{% macro run_date() -%}
+    {#-
+        Logical date of the run (`ds`), from the RUN_DATE env var set by the DAG.
+        Per-run values are read here and never in dbt_project.yml or `--vars`: a change there
+        invalidates the whole partial-parse state, a changed env var only re-parses the nodes
+        that read it.
+    -#}
+    {{ return(env_var("RUN_DATE")) }}
+{%- endmacro %}
+
+{% macro fact_window() -%}
+    {#-
+        Half-open load window [start, end) of the current run, as dates and as dim_date ids.
+        Passed by the DAG as the WINDOW_START / WINDOW_END env vars; defaults to the day
+        before `run_date()`, the same window the extraction uses.
+    -#}
+    {%- set end = env_var("WINDOW_END", "") or run_date() -%}
+    {%- set start = env_var("WINDOW_START", "") or (modules.datetime.date.fromisoformat(end) - modules.datetime.timedelta(days=1)).isoformat() -%}
+    {{ return({
+        "start": start,
+        "end": end,
+        "start_id": start | replace("-", ""),
+        "end_id": end | replace("-", "")
+    }) }}
+{%- endmacro %}
+
+{% macro window_predicates(date_id_column) -%}
+    {#- Limit the incremental MERGE to target rows inside the load window. -#}
+    {%- set window = fact_window() -%}
+    {{ return([
+        "DBT_INTERNAL_DEST." ~ date_id_column ~ " >= '" ~ window.start_id ~ "'",
+        "DBT_INTERNAL_DEST." ~ date_id_column ~ " < '" ~ window.end_id ~ "'"
+    ]) }}
+{%- endmacro %}
+
+{% macro window_condition(date_id_column, anchor="load", open_end=false) -%}
+    {#-
+        Row filter for window-scoped tests: only the rows written by this run.
+        anchor="load": date id inside the load window; anchor="run_date": date id of run_date()
+        (daily snapshots such as fact_inventory). open_end=true keeps only the lower bound, for
+        tests that look for rows dated after the window. Everything is checked when no column
+        is given, on --full-refresh, or with the env var FULL_AUDIT=true.
+    -#}
+    {%- set full_audit = flags.FULL_REFRESH or (env_var("FULL_AUDIT", "false") | string | lower) in ["true", "1", "yes"] -%}
+    {%- if date_id_column is none or full_audit -%}
+        1 = 1
+    {%- elif anchor == "run_date" -%}
+        {{ date_id_column }} {{ ">=" if open_end else "=" }} '{{ run_date() | replace("-", "") }}'
+    {%- else -%}
+        {%- set window = fact_window() -%}
+        {{ date_id_column }} >= '{{ window.start_id }}'
+        {%- if not open_end %} AND {{ date_id_column }} < '{{ window.end_id }}'{% endif -%}
+    {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,25 @@
+{% macro get_where_subquery(relation) -%}
+    {#-
+        dbt's default get_where_subquery, plus the placeholder __window__(<date id column>[, <anchor>])
+        in a test's `where` config, replaced by window_condition() when the test runs. The `where`
+        config is rendered at parse time without project macros, so built-in tests such as
+        `relationships` name the window through the placeholder, e.g.
+        `config: {where: "__window__(saledate_id)"}` or `"__window__(snapshotdate_id, run_date)"`.
+    -#}
+    {%- set where = config.get("where", "") -%}
+    {%- if where -%}
+        {#- re.split with the two groups yields [text, column, anchor, text, column, anchor, ..., text] -#}
+        {%- set parts = modules.re.split("__window__\(\s*(\w+)\s*(?:,\s*(\w+)\s*)?\)", where) -%}
+        {%- set ns = namespace(where=parts[0]) -%}
+        {%- for i in range(1, parts | length, 3) -%}
+            {%- set ns.where = ns.where ~ window_condition(parts[i], parts[i + 1] or "load") ~ parts[i + 2] -%}
+        {%- endfor -%}
+        {%- set where = ns.where -%}
+        {%- set filtered -%}
+            (select * from {{ relation }} where {{ where }}) dbt_subquery
+        {%- endset -%}
+        {% do return(filtered) %}
+    {%- else -%}
+        {% do return(relation) %}
+    {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,24 @@
+{% macro row_hash(columns) -%}
+    {#-
+        MD5 of the given attribute expressions, used by the check snapshots as their only
+        check column. NULLs get a sentinel and values a separator so that ('a', NULL) and
+        (NULL, 'a') or ('ab', 'c') and ('a', 'bc') never hash alike.
+    -#}
+    MD5(CONCAT_WS('||'
+    {%- for column in columns %},
+        COALESCE(CAST({{ column }} AS VARCHAR), '<null>')
+    {%- endfor %}
+    ))
+{%- endmacro %}
+
+{% macro row_hash_columns(model_name) -%}
+    {#-
+        Attribute columns hashed into row_hash, per dimension model. Shared by the models and by
+        backfill_snapshot_row_hash, so a backfilled hash always equals the one the model computes.
+    -#}
+    {{ return({
+        "dim_products": ["product_name", "category", "price"],
+        "dim_suppliers": ["supplier_name", "contact_name", "contact_email"],
+        "dim_warehouses": ["location", "capacity"]
+    }[model_name]) }}
+{%- endmacro %}
@@ -1,13 +1,21 @@
 {{ 
 config(
     materialized="incremental",
-    unique_key="product_id"
+    unique_key="product_id",
+    on_schema_change="append_new_columns"
 )
 }}
 
-SELECT 
-   ABS(product_id) as product_id, 
-   LOWER(TRIM(name)) as product_name, 
-   LOWER(TRIM(category)) as category,
-   CAST(price AS decimal(10,2)) as price
-FROM {{ source("staging", "products") }}
+WITH cleaned AS (
+   SELECT 
+      ABS(product_id) as product_id, 
+      LOWER(TRIM(name)) as product_name, 
+      LOWER(TRIM(category)) as category,
+      CAST(price AS decimal(10,2)) as price
+   FROM {{ source("staging", "products") }}
+)
+
+SELECT
+   *,
+   {{ row_hash(row_hash_columns("dim_products")) }} as row_hash
+FROM cleaned
@@ -1,13 +1,21 @@
 {{ 
 config(
     materialized="incremental",
-    unique_key="supplier_id"
+    unique_key="supplier_id",
+    on_schema_change="append_new_columns"
 )
 }}
 
-SELECT 
-   ABS(supplier_id) as supplier_id,
-   LOWER(TRIM(name)) as supplier_name, 
-   LOWER(TRIM(contact_name)) as contact_name, 
-   LOWER(TRIM(contact_email)) as contact_email
-FROM {{ source("staging", "suppliers") }}
\ No newline at end of file
+WITH cleaned AS (
+   SELECT 
+      ABS(supplier_id) as supplier_id,
+      LOWER(TRIM(name)) as supplier_name, 
+      LOWER(TRIM(contact_name)) as contact_name, 
+      LOWER(TRIM(contact_email)) as contact_email
+   FROM {{ source("staging", "suppliers") }}
+)
+
+SELECT
+   *,
+   {{ row_hash(row_hash_columns("dim_suppliers")) }} as row_hash
+FROM cleaned
@@ -1,12 +1,20 @@
 {{ 
 config(
     materialized="incremental",
-    unique_key="warehouse_id"
+    unique_key="warehouse_id",
+    on_schema_change="append_new_columns"
 )
 }}
 
-SELECT 
-   ABS(warehouse_id) as warehouse_id, 
-   LOWER(TRIM(location)) as location, 
-   ABS(capacity) as capacity
-FROM {{ source("staging","warehouses") }}
\ No newline at end of file
+WITH cleaned AS (
+   SELECT 
+      ABS(warehouse_id) as warehouse_id, 
+      LOWER(TRIM(location)) as location, 
+      ABS(capacity) as capacity
+   FROM {{ source("staging","warehouses") }}
+)
+
+SELECT
+   *,
+   {{ row_hash(row_hash_columns("dim_warehouses")) }} as row_hash
+FROM cleaned
@@ -20,7 +20,7 @@ stock_agg AS (
         d.id AS snapshotdate_id
     FROM {{ source("staging", "stock") }} s
     JOIN {{ ref("dim_date") }} d
-        ON d.dt = TO_DATE('{{ var("run_date") }}','YYYY-MM-DD')
+        ON d.dt = TO_DATE('{{ run_date() }}','YYYY-MM-DD')
     CROSS JOIN latest
     {% if is_incremental() %}
     WHERE d.id > latest.max_snapshot
@@ -1,7 +1,10 @@
 {{
 config(
     materialized="incremental",
-    unique_key=["orderitem_id"]
+    unique_key=["orderitem_id"],
+    incremental_strategy="merge",
+    incremental_predicates=window_predicates("orderdate_id"),
+    cluster_by=["orderdate_id"]
 )
 }}
 
@@ -20,5 +23,5 @@ INNER JOIN {{ source("staging","order_items") }} oi ON o.order_id  = oi.order_id
 LEFT JOIN {{ ref("dim_date") }} d ON d.dt = o.order_date
 
 {% if is_incremental() %}
-WHERE d.id >= (SELECT COALESCE(MAX(orderdate_id), 0) FROM {{ this }})
+WHERE o.order_date >= '{{ fact_window().start }}' AND o.order_date < '{{ fact_window().end }}'
 {% endif %}
@@ -1,7 +1,10 @@
 {{ 
 config(
     materialized="incremental",
-    unique_key=["sale_id"]
+    unique_key=["sale_id"],
+    incremental_strategy="merge",
+    incremental_predicates=window_predicates("saledate_id"),
+    cluster_by=["saledate_id"]
 )
 }}
 
@@ -15,6 +18,6 @@ FROM {{ source("staging","sales") }} s
 LEFT JOIN {{ ref("dim_date") }} d ON s.sale_date = d.dt
 
 {% if is_incremental() %}
-WHERE d.id >= (SELECT COALESCE(MAX(saledate_id), 0) FROM {{ this }})
+WHERE s.sale_date >= '{{ fact_window().start }}' AND s.sale_date < '{{ fact_window().end }}'
 {% endif %}
 
@@ -1,7 +1,10 @@
 {{ 
 config(
     materialized="incremental",
-    unique_key=["shipmentitem_id"]
+    unique_key=["shipmentitem_id"],
+    incremental_strategy="merge",
+    incremental_predicates=window_predicates("shipmentdate_id"),
+    cluster_by=["shipmentdate_id"]
 )
 }}
 
@@ -16,5 +19,5 @@ FROM {{ source("staging", "shipments") }} s INNER JOIN {{ source("staging", "shi
 ON s.shipment_id = si.shipment_id LEFT JOIN {{ ref("dim_date") }} d ON s.shipment_date = d.dt
 
 {% if is_incremental() %}
-WHERE d.id >= (SELECT COALESCE(MAX(shipmentdate_id), 0) FROM {{ this }})
+WHERE s.shipment_date >= '{{ fact_window().start }}' AND s.shipment_date < '{{ fact_window().end }}'
 {% endif %}
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Summarise a `dbt build` run per phase from target/run_results.json and
+target/manifest.json, and print the summary as one JSON line.
+
+Phases follow the old task split of the daily_sales DAG:
+test_source (tests on sources only), run (models), test_model (other tests)
+and snapshot. The last stdout line is picked up by DbtBuildOperator.
+
+Usage:
+    python scripts/phase_timings.py [target_dir]
+"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+
+def _phase(node: dict) -> str:
+    resource_type = node.get("resource_type")
+    if resource_type == "test":
+        upstream = node.get("depends_on", {}).get("nodes", [])
+        if upstream and all(uid.startswith("source.") for uid in upstream):
+            return "test_source"
+        return "test_model"
+    if resource_type == "model":
+        return "run"
+    return resource_type or "other"
+
+
+def _time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def phase_timings(target_dir: Path) -> dict:
+    run_results = json.loads((target_dir / "run_results.json").read_text())
+    nodes = json.loads((target_dir / "manifest.json").read_text()).get("nodes", {})
+
+    phases = {}
+    for result in run_results.get("results", []):
+        node = nodes.get(result["unique_id"], {"resource_type": result["unique_id"].split(".")[0]})
+        stats = phases.setdefault(_phase(node), {"nodes": 0, "failed": 0, "node_seconds": 0.0, "start": None, "end": None})
+
+        stats["nodes"] += 1
+        stats["failed"] += result.get("status") in ("error", "fail")
+        stats["node_seconds"] += result.get("execution_time") or 0.0
+        for timing in result.get("timing", []):
+            if timing.get("started_at") and timing.get("completed_at"):
+                start, end = _time(timing["started_at"]), _time(timing["completed_at"])
+                stats["start"] = min(stats["start"] or start, start)
+                stats["end"] = max(stats["end"] or end, end)
+
+    summary = {}
+    for phase, stats in phases.items():
+        wall = (stats["end"] - stats["start"]).total_seconds() if stats["start"] else 0.0
+        summary[phase] = {
+            "nodes": stats["nodes"],
+            "failed": stats["failed"],
+            "seconds": round(wall, 2),
+            "node_seconds": round(stats["node_seconds"], 2),
+        }
+    summary["total_seconds"] = round(run_results.get("elapsed_time", 0.0), 2)
+    return summary
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "target")
+    try:
+        print(json.dumps(phase_timings(target)))
+    except FileNotFoundError as e:
+        print(json.dumps({"error": str(e)}))
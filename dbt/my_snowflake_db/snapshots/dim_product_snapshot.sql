@@ -5,7 +5,7 @@
       target_schema="snapshot",
       unique_key="product_id",
       strategy="check",
-      check_cols="all"
+      check_cols=["row_hash"]
     )
 }}
 
@@ -13,7 +13,8 @@ SELECT
    product_id, 
    product_name, 
    category,
-   price
+   price,
+   row_hash
 FROM {{ ref("dim_products") }}
 
 {% endsnapshot %}
\ No newline at end of file
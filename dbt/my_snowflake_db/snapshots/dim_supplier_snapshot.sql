@@ -5,7 +5,7 @@
       target_schema="snapshot",
       unique_key="supplier_id",
       strategy="check",
-      check_cols="all"
+      check_cols=["row_hash"]
     )
 }}
 
@@ -13,7 +13,8 @@ SELECT
    supplier_id, 
    supplier_name, 
    contact_name, 
-   contact_email
+   contact_email,
+   row_hash
 FROM {{ ref("dim_suppliers") }}
 
 {% endsnapshot %}
\ No newline at end of file
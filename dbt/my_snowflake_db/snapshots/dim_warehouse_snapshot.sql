@@ -5,14 +5,15 @@
       target_schema="snapshot",
       unique_key="warehouse_id",
       strategy="check",
-      check_cols="all"
+      check_cols=["row_hash"]
     )
 }}
 
 SELECT 
    warehouse_id, 
    location, 
-   capacity
+   capacity,
+   row_hash
 FROM {{ ref("dim_warehouses") }}
 
 {% endsnapshot %}
\ No newline at end of file
@@ -1,4 +1,4 @@
-{% test validate_fact_inventory_arrays(model) %}
+{% test validate_fact_inventory_arrays(model, window_column=none, window_anchor="load") %}
 
 SELECT
     m.warehouse_id,
@@ -9,6 +9,7 @@ SELECT
     m.total_stock
 FROM {{ model }} AS m,
      LATERAL FLATTEN(input => COALESCE(m.stock_array, ARRAY_CONSTRUCT())) f
+WHERE {{ window_condition("m." ~ window_column if window_column else none, window_anchor) }}
 GROUP BY m.warehouse_id, m.snapshotdate_id, m.total_stock, m.product_id_array, m.stock_array
 HAVING ARRAY_SIZE(COALESCE(m.product_id_array, ARRAY_CONSTRUCT())) 
            != ARRAY_SIZE(COALESCE(m.stock_array, ARRAY_CONSTRUCT()))
@@ -16,13 +17,14 @@ HAVING ARRAY_SIZE(COALESCE(m.product_id_array, ARRAY_CONSTRUCT()))
 
 {% endtest %}
 
-{% test validate_arrays_ref_other_table(model, column_name, ref_table, ref_column) %}
+{% test validate_arrays_ref_other_table(model, column_name, ref_table, ref_column, window_column=none, window_anchor="load") %}
 
 WITH exploded AS (
     SELECT 
         f.value AS ref_value
     FROM {{ model }} m,
          LATERAL FLATTEN(input => m.{{ column_name }}) f
+    WHERE {{ window_condition("m." ~ window_column if window_column else none, window_anchor) }}
 )
 
 SELECT e.ref_value
@@ -33,16 +35,17 @@ WHERE r.{{ ref_column }} IS NULL
 
 {% endtest %}
 
-{% test validate_arrays_negative(model, column_name) %}
+{% test validate_arrays_negative(model, column_name, window_column=none, window_anchor="load") %}
 
 WITH exploded AS (
     SELECT f.value::NUMBER AS element_value
     FROM {{ model }} AS m,
          LATERAL FLATTEN(input => m.{{ column_name }}) AS f
+    WHERE {{ window_condition("m." ~ window_column if window_column else none, window_anchor) }}
 )
 
 SELECT element_value
 FROM exploded
 WHERE element_value < 0
 
-{% endtest %}
\ No newline at end of file
+{% endtest %}
@@ -5,11 +5,13 @@
 
 {% endtest %}
 
-{% test no_future_dates(model, column_name) %}
+{% test no_future_dates(model, column_name, window_column=none, window_anchor="load") %}
 
+{#- lower bound only: rows dated after the load window are exactly what this test looks for -#}
 with max_val as (
     select max({{ column_name }}) as max_date_id
     from {{ model }}
+    where {{ window_condition(window_column, window_anchor, open_end=true) }}
 )
 
 select mv.max_date_id
@@ -17,6 +19,6 @@ from max_val mv
 left join {{ ref('dim_date') }} dd
     on mv.max_date_id = dd.id
 where mv.max_date_id is not null
-  and dd.dt > '{{ var("run_date") }}'
+  and dd.dt > '{{ run_date() }}'
 
 {% endtest %}
\ No newline at end of file